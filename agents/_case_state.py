@@ -0,0 +1,255 @@
+"""
+Incremental case-detail collection for the emergency agents.
+
+Instead of re-reading the whole conversation with a second LLM call when a
+case is submitted, the agent records case fields as the user provides them
+through a ``record_case_details`` tool. The fields accumulate in the graph
+state, and submission builds the case directly from them, falling back to
+LLM extraction only when required fields are still missing.
+
+``CaseTools`` holds the tool node and submission logic the emergency agents
+share, so each agent only supplies its schema, retriever and save function.
+"""
+
+import asyncio
+import logging
+from typing import Annotated, Any, Callable, Optional, Sequence
+from langchain_core.messages import BaseMessage, ToolMessage
+from langchain_core.runnables import Runnable
+from langchain_core.tools import BaseTool, StructuredTool
+from langgraph.graph import MessagesState
+from pydantic import BaseModel, ValidationError
+from utils.message_formatter import conversation_messages
+
+RECORD_TOOL_NAME = "record_case_details"
+
+logger = logging.getLogger(__name__)
+
+
+def merge_fields(left: Optional[dict[str, Any]], right: Optional[dict[str, Any]]) -> dict[str, Any]:
+    """Reducer that overlays newly recorded, non-empty fields on earlier ones."""
+    merged = dict(left or {})
+    merged.update({name: value for name, value in (right or {}).items() if value not in (None, "")})
+    return merged
+
+
+class CaseState(MessagesState):
+    """Conversation state plus the case fields recorded so far."""
+
+    collected_fields: Annotated[dict[str, Any], merge_fields]
+
+
+def create_record_tool(schema: type[BaseModel], case_kind: str) -> StructuredTool:
+    """
+    Create the tool the model calls to record case fields as they are given.
+
+    Args:
+        schema: Case schema whose fields the tool accepts (all optional)
+        case_kind: Human-readable case type used in the tool description
+
+    Returns:
+        StructuredTool: ``record_case_details`` tool taking the schema's fields
+    """
+    def record_case_details(**fields: Any) -> str:
+        # Handled by the agent's custom tool node, which updates the state
+        return "Details recorded."
+
+    return StructuredTool.from_function(
+        func=record_case_details,
+        name=RECORD_TOOL_NAME,
+        description=(
+            f"Record {case_kind} case details as soon as the user provides them. "
+            "Pass only the fields you learned; earlier values are kept."
+        ),
+        args_schema=schema,
+    )
+
+
+def validate_fields(schema: type[BaseModel], fields: dict[str, Any]) -> tuple[dict[str, Any], list[str]]:
+    """
+    Validate recorded case fields one at a time against the case schema.
+
+    Every schema field is optional, so each value is checked on its own and a
+    bad value only rejects that field.
+
+    Args:
+        schema: Case schema the fields belong to
+        fields: Field values as given by the model
+
+    Returns:
+        tuple[dict[str, Any], list[str]]: Validated (coerced) values, and the
+        names of fields whose values were rejected; unknown keys are dropped
+    """
+    accepted: dict[str, Any] = {}
+    rejected: list[str] = []
+    for name, value in fields.items():
+        if name not in schema.model_fields:
+            continue
+        try:
+            accepted[name] = getattr(schema.model_validate({name: value}), name)
+        except ValidationError:
+            rejected.append(name)
+    return accepted, rejected
+
+
+def build_collected_case(state: dict, schema: type[BaseModel], required: tuple[str, ...]) -> Optional[BaseModel]:
+    """
+    Build the case from recorded fields if every required field is present.
+
+    Args:
+        state: Graph state holding ``collected_fields``
+        schema: Case schema to build
+        required: Field names that must have been recorded
+
+    Returns:
+        BaseModel | None: Case built from the recorded fields, or None if any
+        required field is missing
+    """
+    fields = state.get("collected_fields") or {}
+    if any(fields.get(name) in (None, "") for name in required):
+        return None
+    return schema(**fields)
+
+
+class CaseTools:
+    """
+    Tool handling and case submission shared by the emergency agents.
+
+    Args:
+        schema: Case schema the agent collects
+        case_kind: Human-readable case type, e.g. ``"fire emergency"``
+        required_fields: Fields that must be recorded to submit without extraction
+        extraction_chain: Runnable extracting ``schema`` from ``{"conversation": [...]}``
+        save: Blocking function saving ``(user_id, case)`` and returning the case ID
+        notified: Sentence telling the user who received the case
+        retriever_tool: The agent's knowledge-base retriever tool
+        context: Optional function returning extra messages (e.g. a rolling
+            summary) placed before the conversation for extraction
+    """
+
+    def __init__(
+        self,
+        schema: type[BaseModel],
+        case_kind: str,
+        required_fields: tuple[str, ...],
+        extraction_chain: Runnable,
+        save: Callable[[str, BaseModel], str],
+        notified: str,
+        retriever_tool: BaseTool,
+        context: Optional[Callable[[dict], Sequence[BaseMessage]]] = None,
+    ):
+        self.schema = schema
+        self.case_kind = case_kind
+        self.required_fields = required_fields
+        self.extraction_chain = extraction_chain
+        self.save = save
+        self.notified = notified
+        self.retriever_tool = retriever_tool
+        self.context = context
+        self.record_tool = create_record_tool(schema, case_kind)
+
+    async def submit(self, state: dict) -> dict:
+        """
+        Submit the case to the database.
+
+        Args:
+            state: Current agent state with conversation history and recorded fields
+
+        Returns:
+            dict: Submission result with ``status``, ``case_id`` and ``message``
+        """
+        try:
+            # Use the fields recorded during the conversation; fall back to LLM extraction if some are missing
+            case = build_collected_case(state, self.schema, self.required_fields)
+            if case is None:
+                context = list(self.context(state)) if self.context else []
+                extracted = await self.extraction_chain.ainvoke({"conversation": [*context, *conversation_messages(state)]})
+                # Validate the merge so recorded values are coerced like extracted ones, and win over them
+                case = self.schema.model_validate({**extracted.model_dump(), **(state.get("collected_fields") or {})})
+
+            user_id = "default_user"  # In real implementation, this would come from authentication
+            case_id = await asyncio.to_thread(self.save, user_id, case)
+
+            logger.info(f"{self.case_kind.capitalize()} case saved to database with ID: {case_id}")
+
+            return {
+                "status": "submitted",
+                "case_id": case_id,
+                "message": f"{self.case_kind.capitalize()} case has been submitted successfully. {self.notified}",
+            }
+        except Exception as e:
+            logger.error(f"Error submitting {self.case_kind} case: {e}")
+            return {
+                "status": "error",
+                "case_id": None,
+                "message": f"Failed to submit {self.case_kind} case: {e}",
+            }
+
+    async def tool_node(self, state: dict) -> dict:
+        """
+        Run the tool calls of the last AI message with access to the agent state.
+
+        Recorded fields are applied before anything else so a ``submit_case`` in
+        the same turn sees them; independent calls (e.g. several retriever
+        queries) run concurrently.
+
+        Args:
+            state: Current agent state
+
+        Returns:
+            dict: Tool messages, one per call, and the newly recorded fields
+        """
+        ai_msg = state["messages"][-1]
+        tool_calls = getattr(ai_msg, "tool_calls", None) or []
+        if not tool_calls:
+            return {"messages": []}
+
+        # Only values that pass the schema are kept, so one bad value cannot break every later submit
+        recorded: dict = {}
+        rejected_by_call: dict[str, list[str]] = {}
+        for call in tool_calls:
+            if call["name"] == RECORD_TOOL_NAME:
+                accepted, rejected_by_call[call["id"]] = validate_fields(self.schema, call["args"])
+                recorded.update(accepted)
+        if recorded:
+            state = {**state, "collected_fields": merge_fields(state.get("collected_fields"), recorded)}
+
+        async def run_call(call) -> ToolMessage:
+            tool_name = call["name"]
+            tool_call_id = call["id"]
+
+            if tool_name == self.retriever_tool.name:
+                observation = await self.retriever_tool.ainvoke(call["args"])
+                return ToolMessage(content=str(observation), tool_call_id=tool_call_id)
+            match tool_name:
+                case "record_case_details":
+                    # Valid fields were already applied to the state above
+                    rejected = rejected_by_call.get(tool_call_id)
+                    if rejected:
+                        return ToolMessage(
+                            content=f"Invalid values not recorded for: {', '.join(rejected)}. Ask the user for these details again.",
+                            tool_call_id=tool_call_id,
+                            status="error",
+                        )
+                    return ToolMessage(content="Details recorded.", tool_call_id=tool_call_id)
+                case "submit_case":
+                    result = await self.submit(state)
+                    if result["status"] != "submitted":
+                        return ToolMessage(content=result["message"], tool_call_id=tool_call_id, status="error")
+                    return ToolMessage(
+                        content=f"Case submitted successfully. Case ID: {result['case_id']}. {result['message']}",
+                        tool_call_id=tool_call_id,
+                    )
+                case _:
+                    # Every tool call needs a response, or the next model call is rejected
+                    return ToolMessage(content=f"Unknown tool: {tool_name}", tool_call_id=tool_call_id, status="error")
+
+        # gather keeps results in tool call order; a failing call must not cancel the others
+        outcomes = await asyncio.gather(*(run_call(call) for call in tool_calls), return_exceptions=True)
+        results: list[ToolMessage] = []
+        for call, outcome in zip(tool_calls, outcomes):
+            if isinstance(outcome, Exception):
+                logger.error(f"Error running tool {call['name']}: {outcome}")
+                outcome = ToolMessage(content=f"Error: {outcome}", tool_call_id=call["id"], status="error")
+            results.append(outcome)
+        return {"messages": results, "collected_fields": recorded}
@@ -0,0 +1,171 @@
+"""
+Write-batching MongoDB checkpointer for the agent graphs.
+
+``MongoDBSaver`` issues one blocking ``update_one``/``bulk_write`` per graph step
+(generate -> tools -> generate), i.e. several Mongo round trips per user turn.
+``BatchingMongoDBSaver`` buffers those writes in memory and sends them in one
+``bulk_write`` per collection when ``flush()`` is called at the end of a turn.
+Reads and deletes flush first, so the saver always sees its own writes. A
+batch that fails is retried on later flushes only for transient errors, at most
+``FLUSH_MAX_ATTEMPTS`` times, and then dropped, so it cannot block reads.
+
+Large serialized checkpoints are zlib-compressed, and writes use an
+unjournaled ``w=1`` write concern since conversation checkpoints are not
+critical data.
+"""
+
+import asyncio
+import logging
+import threading
+import zlib
+from typing import Any
+from pymongo import MongoClient, UpdateOne, WriteConcern
+from pymongo.collection import Collection
+from pymongo.errors import ConnectionFailure, PyMongoError
+from langgraph.checkpoint.mongodb import MongoDBSaver
+from langgraph.checkpoint.serde.base import SerializerProtocol
+
+# Flush attempts a batch gets after transient errors (network, primary step-down) before it is dropped
+FLUSH_MAX_ATTEMPTS = 3
+
+# Serialized values at least this large are compressed
+COMPRESS_MIN_BYTES = 1024
+_COMPRESSED_SUFFIX = "+zlib"
+
+logger = logging.getLogger(__name__)
+
+
+def _is_transient(error: Exception) -> bool:
+    """Return whether a write error is worth retrying (connection loss, failover)."""
+    return isinstance(error, ConnectionFailure) or (
+        isinstance(error, PyMongoError) and error.has_error_label("RetryableWriteError")
+    )
+
+
+class CompressedSerializer(SerializerProtocol):
+    """
+    Serializer that zlib-compresses large payloads of another serializer.
+
+    Compressed values are tagged with a ``+zlib`` type suffix, so checkpoints
+    written before compression was enabled still load unchanged.
+    """
+
+    def __init__(self, serde: SerializerProtocol):
+        self.serde = serde
+
+    def dumps_typed(self, obj: Any) -> tuple[str, bytes]:
+        type_, data = self.serde.dumps_typed(obj)
+        if len(data) < COMPRESS_MIN_BYTES:
+            return type_, data
+        return f"{type_}{_COMPRESSED_SUFFIX}", zlib.compress(data)
+
+    def loads_typed(self, data: tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if type_.endswith(_COMPRESSED_SUFFIX):
+            return self.serde.loads_typed((type_[:-len(_COMPRESSED_SUFFIX)], zlib.decompress(payload)))
+        return self.serde.loads_typed((type_, payload))
+
+
+class _BufferedCollection:
+    """Collection proxy that queues upserts until the owning saver flushes."""
+
+    def __init__(self, collection: Collection, saver: "BatchingMongoDBSaver", ordered: bool):
+        self._collection = collection
+        self._saver = saver
+        self._ordered = ordered
+        self._pending: list[UpdateOne] = []
+        self._failed_attempts = 0
+
+    def update_one(self, filter: dict, update: dict, upsert: bool = False, **kwargs: Any) -> None:
+        with self._saver.lock:
+            self._pending.append(UpdateOne(filter, update, upsert=upsert, **kwargs))
+
+    def bulk_write(self, requests: list, **kwargs: Any) -> None:
+        with self._saver.lock:
+            self._pending.extend(requests)
+
+    def find(self, *args: Any, **kwargs: Any):
+        self._saver.flush_before_read()
+        return self._collection.find(*args, **kwargs)
+
+    def delete_many(self, *args: Any, **kwargs: Any):
+        self._saver.flush_before_read()
+        return self._collection.delete_many(*args, **kwargs)
+
+    def _flush(self) -> None:
+        if not self._pending:
+            return
+        try:
+            self._collection.bulk_write(self._pending, ordered=self._ordered)
+        except Exception as e:
+            self._failed_attempts += 1
+            if _is_transient(e) and self._failed_attempts < FLUSH_MAX_ATTEMPTS:
+                # Keep the queue so the next flush retries it; the writes are idempotent upserts
+                logger.error(
+                    f"Error writing {len(self._pending)} buffered operations to {self._collection.name} "
+                    f"(attempt {self._failed_attempts}/{FLUSH_MAX_ATTEMPTS}), keeping them queued: {e}"
+                )
+            else:
+                # A permanent error (or one that keeps recurring) would otherwise block every later flush
+                logger.error(f"Dropping {len(self._pending)} buffered operations for {self._collection.name}: {e}")
+                self._pending = []
+                self._failed_attempts = 0
+            raise
+        self._pending = []
+        self._failed_attempts = 0
+
+    def __getattr__(self, name: str):
+        return getattr(self._collection, name)
+
+
+class BatchingMongoDBSaver(MongoDBSaver):
+    """
+    MongoDBSaver that buffers checkpoint writes until ``flush()`` is called.
+
+    Call ``flush()`` (or ``aflush()`` from async code) once the graph run for a
+    request has finished. The inherited async methods run the buffered sync
+    methods in a worker thread, so the saver also works with ``astream``/``ainvoke``.
+    """
+
+    def __init__(
+        self,
+        client: MongoClient,
+        write_concern: WriteConcern = WriteConcern(w=1, j=False),
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(client, **kwargs)
+        self.lock = threading.RLock()
+        self.serde = CompressedSerializer(self.serde)
+        checkpoints = self.checkpoint_collection.with_options(write_concern=write_concern)
+        writes = self.writes_collection.with_options(write_concern=write_concern)
+        # Checkpoint ids are unique per put, so those upserts can run unordered.
+        # Writes may upsert the same key twice (error then retry), so keep their order.
+        self.checkpoint_collection = _BufferedCollection(checkpoints, self, ordered=False)
+        self.writes_collection = _BufferedCollection(writes, self, ordered=True)
+
+    def flush(self) -> None:
+        """
+        Send every buffered checkpoint write to MongoDB.
+
+        Raises:
+            Exception: If the bulk write fails
+        """
+        with self.lock:
+            try:
+                self.checkpoint_collection._flush()
+                self.writes_collection._flush()
+            except Exception as e:
+                logger.error(f"Error flushing checkpoint writes: {e}")
+                raise
+
+    def flush_before_read(self) -> None:
+        """Flush ahead of a read; a failed flush is logged and the read still runs."""
+        try:
+            self.flush()
+        except Exception:
+            # Already logged; a stuck batch must not fail reads for unrelated threads
+            pass
+
+    async def aflush(self) -> None:
+        """Send every buffered checkpoint write without blocking the event loop."""
+        await asyncio.to_thread(self.flush)
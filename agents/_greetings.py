@@ -0,0 +1,39 @@
+"""
+Detection of greeting-only messages.
+
+A bare "hello" that opens a conversation gets the same introduction every time,
+so agents can answer it with a canned reply instead of a model round trip.
+Only unambiguous greetings in English and Spanish are recognised; anything else
+goes to the model, which handles every language and off-topic request.
+"""
+
+import re
+
+_GREETING_PATTERNS = {
+    "en": re.compile(
+        r"^\W*(hi|hello|hey|hiya|greetings|good (morning|afternoon|evening))( there)?\W*$",
+        re.IGNORECASE,
+    ),
+    "es": re.compile(
+        r"^\W*(hola|buen[oa]s( d[ií]as| tardes| noches)?|saludos)\W*$",
+        re.IGNORECASE,
+    ),
+}
+
+
+def greeting_language(text: str) -> str | None:
+    """
+    Get the language of a message that is only a greeting.
+
+    Args:
+        text: User message content
+
+    Returns:
+        str | None: ``"en"`` or ``"es"`` for a bare greeting, otherwise None
+    """
+    if not isinstance(text, str):
+        return None
+    for language, pattern in _GREETING_PATTERNS.items():
+        if pattern.match(text):
+            return language
+    return None
@@ -0,0 +1,192 @@
+"""
+Shared chat model clients for the emergency agents.
+
+Every agent used to build its own ``ChatOpenAI`` client (each with its own HTTP
+connection pool) and bind its tools at import time. Clients are now created
+once per model and tool bindings are cached by tool signature, so agents reuse
+the same underlying connection pool.
+"""
+
+import importlib.util
+import logging
+import threading
+import time
+from functools import lru_cache
+from typing import Sequence
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, RemoveMessage, SystemMessage, trim_messages
+from langchain_core.tools import BaseTool
+from langchain_openai import ChatOpenAI
+from openai import DefaultAsyncHttpxClient, DefaultHttpxClient
+import httpx
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+# Load environment variables
+load_dotenv()
+
+DEFAULT_MODEL = "gpt-4o-mini"
+
+# Prompt budget for conversation history, and how many recent messages are considered
+HISTORY_MAX_TOKENS = 2000
+HISTORY_WINDOW = 20
+# Messages kept when tokens cannot be counted (e.g. tiktoken cannot download its encoding)
+HISTORY_FALLBACK_MESSAGES = 6
+# After token counting fails, seconds before it is tried again
+TOKEN_COUNT_RETRY_SECONDS = 300
+
+# Stored messages that trigger folding older turns into the rolling summary,
+# and how many recent messages are kept verbatim when that happens
+SUMMARY_TRIGGER_MESSAGES = 12
+SUMMARY_KEEP_MESSAGES = 6
+
+SUMMARY_INSTRUCTIONS = """\
+You maintain a running summary of an emergency assistance conversation for {focus}.
+Merge the summary so far with the new conversation turns into one updated summary.
+Keep every concrete detail the user gave (names, ages, phone numbers, locations,
+symptoms, conditions, medications, allergies, times, urgency) and the guidance
+already given. Write plain, compact sentences in English.
+
+Summary so far:
+{summary}"""
+
+# Connection pool shared by every chat and embeddings client, sized for concurrent requests
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50)
+# HTTP/2 multiplexes concurrent requests over one connection; httpx needs the h2 package for it
+HTTP2 = importlib.util.find_spec("h2") is not None
+HTTP_CLIENT = DefaultHttpxClient(limits=HTTP_LIMITS, http2=HTTP2)
+HTTP_ASYNC_CLIENT = DefaultAsyncHttpxClient(limits=HTTP_LIMITS, http2=HTTP2)
+
+_bound_llms: dict = {}
+_bound_llms_lock = threading.Lock()
+# Until this monotonic time token counting is skipped, so a failing encoding download is not retried every turn
+_token_counting_retry_at = 0.0
+
+
+@lru_cache(maxsize=None)
+def get_llm(model: str = DEFAULT_MODEL) -> ChatOpenAI:
+    """
+    Get the shared chat client for a model, creating it on first use.
+
+    Args:
+        model: OpenAI chat model name
+
+    Returns:
+        ChatOpenAI: Chat client shared by every caller asking for the same model
+    """
+    return ChatOpenAI(model=model, http_client=HTTP_CLIENT, http_async_client=HTTP_ASYNC_CLIENT)
+
+
+def get_llm_with_tools(tools: Sequence[BaseTool], model: str = DEFAULT_MODEL):
+    """
+    Get the shared chat client bound to a set of tools.
+
+    Bindings are cached by the tools' names and descriptions, since several
+    agents expose different tools under the same name (e.g. ``submit_case``).
+
+    Args:
+        tools: Tools the model may call
+        model: OpenAI chat model name
+
+    Returns:
+        Runnable: Chat client with the tools bound
+    """
+    signature = (model, tuple((t.name, t.description) for t in tools))
+    with _bound_llms_lock:
+        if signature not in _bound_llms:
+            _bound_llms[signature] = get_llm(model).bind_tools(list(tools))
+        return _bound_llms[signature]
+
+
+def trim_history(messages: Sequence[BaseMessage], max_tokens: int = HISTORY_MAX_TOKENS) -> list[BaseMessage]:
+    """
+    Keep the most recent messages that fit in a token budget.
+
+    The kept history always starts on a user message, so tool results are never
+    separated from the AI message that requested them.
+
+    Args:
+        messages: Conversation history, oldest first
+        max_tokens: Maximum number of tokens to keep
+
+    Returns:
+        list[BaseMessage]: Trimmed history, oldest first
+    """
+    global _token_counting_retry_at
+    recent = list(messages[-HISTORY_WINDOW:])
+    trimmed = None
+    if time.monotonic() >= _token_counting_retry_at:
+        try:
+            trimmed = trim_messages(
+                recent,
+                max_tokens=max_tokens,
+                strategy="last",
+                token_counter=get_llm(),
+                start_on="human",
+                include_system=False,
+            )
+        except Exception as e:
+            _token_counting_retry_at = time.monotonic() + TOKEN_COUNT_RETRY_SECONDS
+            logger.warning(
+                f"Error trimming history by tokens, keeping the last {HISTORY_FALLBACK_MESSAGES} messages "
+                f"for {TOKEN_COUNT_RETRY_SECONDS}s: {e}"
+            )
+    if trimmed is None:
+        # Drop leading tool results and AI messages so the history still starts on a user turn
+        fallback = recent[-HISTORY_FALLBACK_MESSAGES:]
+        start = next((i for i, m in enumerate(fallback) if m.type == "human"), len(fallback))
+        trimmed = fallback[start:]
+
+    # A single oversized turn (or a long tool loop) would trim to nothing; keep the current turn instead
+    if not trimmed:
+        last_human = max((i for i, m in enumerate(recent) if m.type == "human"), default=0)
+        trimmed = recent[last_human:]
+    return trimmed
+
+
+async def summarize_history(messages: Sequence[BaseMessage], summary: str = "", focus: str = "continuity") -> dict:
+    """
+    Fold older turns into a rolling summary once the history grows too long.
+
+    Below ``SUMMARY_TRIGGER_MESSAGES`` stored messages nothing happens, so the
+    summary is only regenerated after enough new messages have accumulated.
+    The cut is moved back to a user message so tool calls stay with their
+    results.
+
+    Args:
+        messages: Stored conversation history, oldest first
+        summary: Summary of turns folded in earlier
+        focus: What the summary has to preserve, e.g. "medical triage continuity"
+
+    Returns:
+        dict: State update with the new ``summary`` and ``RemoveMessage`` entries
+        for the folded messages, or an empty dict when nothing is folded
+    """
+    if len(messages) <= SUMMARY_TRIGGER_MESSAGES:
+        return {}
+    cut = len(messages) - SUMMARY_KEEP_MESSAGES
+    while cut > 0 and not isinstance(messages[cut], HumanMessage):
+        cut -= 1
+    if cut <= 0:
+        return {}
+
+    older = messages[:cut]
+    turns = [
+        message if isinstance(message, HumanMessage) else AIMessage(content=message.content)
+        for message in older
+        if isinstance(message, (HumanMessage, AIMessage)) and message.content
+    ]
+    try:
+        response = await get_llm().ainvoke([
+            SystemMessage(content=SUMMARY_INSTRUCTIONS.format(focus=focus, summary=summary or "(none)")),
+            *turns,
+            HumanMessage(content="Write the updated summary."),
+        ])
+    except Exception as e:
+        # Keep the full history rather than losing the older turns
+        logger.error(f"Error summarizing conversation history: {e}")
+        return {}
+    return {
+        "summary": response.content,
+        "messages": [RemoveMessage(id=message.id) for message in older],
+    }
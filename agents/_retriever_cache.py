@@ -0,0 +1,895 @@
+"""
+Shared retriever construction for the emergency agents.
+
+Building a retriever reads the source file from ``data/``, splits it and embeds
+every chunk against the OpenAI API. The result is cached per process so every
+agent asking for the same source reuses one vector store, and chunk vectors are
+persisted to a local SQLite file so a restart does not re-embed unchanged chunks;
+the built FAISS index is saved next to it and loaded back on restart.
+Query embeddings are cached the same way, behind an in-process LRU.
+
+When ``faiss`` is installed (the ``faiss`` extra, which the Docker image
+includes) chunks are indexed with FAISS (exact inner product for small corpora,
+an HNSW graph for large ones); otherwise a brute-force store over
+pre-normalized float16 numpy vectors is used.
+"""
+
+import asyncio
+import os
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache, partial
+from typing import Any, Callable, Iterable, Optional
+from uuid import uuid4
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.embeddings import Embeddings
+from langchain_openai import OpenAIEmbeddings
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.runnables.config import ensure_config
+from pydantic import PrivateAttr
+from langchain_core.vectorstores import VectorStore
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from dotenv import load_dotenv
+from configurations.config import config
+from agents._llm import HTTP_ASYNC_CLIENT, HTTP_CLIENT
+
+logger = logging.getLogger(__name__)
+
+# Load environment variables
+load_dotenv()
+
+EMBEDDING_MODEL = config.EMBEDDING_MODEL
+EMBEDDING_DIMENSIONS = config.EMBEDDING_DIMENSIONS
+# Chunks are measured in tokens of the embedding model's tokenizer
+CHUNK_SIZE = 512
+CHUNK_OVERLAP = 50
+CHUNK_TOKENIZER_MODEL = "text-embedding-3-small"
+# Boundaries the fallback splitter tries in order: paragraphs, lines, sentences, words
+CHUNK_SEPARATORS = ["\n\n", "\n", ". ", " ", ""]
+EMBEDDING_CACHE_PATH = os.path.join(config.CACHE_DIR, "embeddings.sqlite")
+# Keys looked up per SQLite query, well under its host-parameter limit
+CACHE_LOOKUP_BATCH_SIZE = 500
+INDEX_CACHE_DIR = os.path.join(config.CACHE_DIR, "indexes")
+
+# Below this many chunks an exact flat index is faster than an HNSW graph
+HNSW_MIN_VECTORS = 10000
+
+# From this many chunks the flat index stores int8 scalar-quantized vectors
+# (4x smaller); smaller corpora keep exact float32 vectors
+SQ_MIN_VECTORS = 1000
+
+# HNSW graph parameters (neighbours per node, build and search beam widths)
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 64
+
+# Without faiss, vectors are kept in half precision (2x smaller) and scored in
+# float32 blocks of this many rows, so BLAS still does the products
+BRUTE_FORCE_BLOCK_ROWS = 4096
+
+# Texts sent per embeddings request when filling cache misses. OpenAI caps a
+# request at 2048 inputs and 300k tokens in total, so a batch holds as many
+# full-size chunks as fit the token cap; each batch is exactly one API request
+# (it stays under the OpenAIEmbeddings chunk_size of 1000)
+EMBED_MAX_TOKENS_PER_REQUEST = 300_000
+EMBED_BATCH_SIZE = min(1000, EMBED_MAX_TOKENS_PER_REQUEST // (CHUNK_SIZE + CHUNK_OVERLAP))
+# Embedding requests sent at once while indexing a large corpus
+EMBED_MAX_CONCURRENCY = 4
+
+# Candidates fetched for, and results kept after, cross-encoder reranking
+RERANK_FETCH_K = 10
+RERANK_TOP_N = 2
+
+# Number of query embeddings kept in process memory
+QUERY_CACHE_SIZE = 4096
+
+# Number of normalized queries per retriever whose results are kept in memory
+RESULT_CACHE_SIZE = 512
+
+# Per-conversation retrieval cache: results kept per thread, threads kept, and
+# the cosine similarity at which a paraphrased query reuses cached results
+THREAD_CACHE_SIZE = 16
+THREAD_CACHE_THREADS = 1024
+THREAD_CACHE_SIMILARITY = 0.95
+
+# Cross-conversation retrieval cache: queries kept, and the stricter cosine
+# similarity at which a paraphrase from any conversation reuses cached results
+SEMANTIC_CACHE_SIZE = 1024
+SEMANTIC_CACHE_SIMILARITY = 0.97
+
+
+def _create_embeddings(model: str, dimensions: int) -> Embeddings:
+    """
+    Create an embeddings client for the configured backend.
+
+    ``EMBEDDING_BACKEND=infinity`` embeds with a self-hosted Infinity server at
+    ``INFINITY_API_URL`` (``EMBEDDING_MODEL`` must then name a model it serves,
+    e.g. ``BAAI/bge-large-en-v1.5``); anything else uses the OpenAI API.
+
+    Args:
+        model: Embedding model name
+        dimensions: Length OpenAI vectors are shortened to (Infinity models keep their own)
+
+    Returns:
+        Embeddings: Client used for both chunks and queries
+    """
+    if config.EMBEDDING_BACKEND == "infinity":
+        from langchain_community.embeddings import InfinityEmbeddings
+
+        return InfinityEmbeddings(model=model, infinity_api_url=config.INFINITY_API_URL)
+    return OpenAIEmbeddings(
+        model=model, dimensions=dimensions, http_client=HTTP_CLIENT, http_async_client=HTTP_ASYNC_CLIENT
+    )
+
+
+# Single embeddings client reused by all agents
+_EMBEDDINGS = _create_embeddings(EMBEDDING_MODEL, EMBEDDING_DIMENSIONS)
+
+
+@contextmanager
+def _connect_cache():
+    """Open the embedding cache database, committing and closing it on exit."""
+    os.makedirs(os.path.dirname(EMBEDDING_CACHE_PATH) or ".", exist_ok=True)
+    connection = sqlite3.connect(EMBEDDING_CACHE_PATH)
+    try:
+        with connection:
+            connection.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB)")
+            connection.execute("CREATE TABLE IF NOT EXISTS splits (key TEXT PRIMARY KEY, chunks TEXT)")
+            yield connection
+    finally:
+        connection.close()
+
+
+def _load_vectors(keys: list[str]) -> dict[str, list[float]]:
+    """Fetch cached vectors for the given keys, skipping the cache on errors."""
+    if not keys:
+        return {}
+    try:
+        rows = []
+        with _connect_cache() as connection:
+            for start in range(0, len(keys), CACHE_LOOKUP_BATCH_SIZE):
+                batch = keys[start:start + CACHE_LOOKUP_BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                rows.extend(connection.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall())
+        return {key: np.frombuffer(blob, dtype=np.float32).tolist() for key, blob in rows}
+    except Exception as e:
+        logger.error(f"Error reading embedding cache: {e}")
+        return {}
+
+
+def _save_vectors(items: list[tuple[str, list[float]]]) -> None:
+    """Store vectors in the cache, logging instead of failing on errors."""
+    try:
+        with _connect_cache() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in items],
+            )
+    except Exception as e:
+        logger.error(f"Error writing embedding cache: {e}")
+
+
+def _load_splits(key: str) -> Optional[list[Document]]:
+    """Fetch the cached chunks of a source, or None if they are not cached."""
+    try:
+        with _connect_cache() as connection:
+            row = connection.execute("SELECT chunks FROM splits WHERE key = ?", (key,)).fetchone()
+    except Exception as e:
+        logger.error(f"Error reading split cache: {e}")
+        return None
+    if row is None:
+        return None
+    return [Document(page_content=content, metadata=metadata) for content, metadata in json.loads(row[0])]
+
+
+def _save_splits(key: str, chunks: list[Document]) -> None:
+    """Store the chunks of a source, logging instead of failing on errors."""
+    try:
+        payload = json.dumps([(chunk.page_content, chunk.metadata) for chunk in chunks])
+        with _connect_cache() as connection:
+            connection.execute("INSERT OR REPLACE INTO splits (key, chunks) VALUES (?, ?)", (key, payload))
+    except Exception as e:
+        logger.error(f"Error writing split cache: {e}")
+
+
+class LRUCache:
+    """Small thread-safe least-recently-used mapping."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+# Query vectors shared by every store, keyed by sha256(model:dimensions|query|normalized text)
+_QUERY_VECTORS = LRUCache(QUERY_CACHE_SIZE)
+
+
+def normalize_query(text: str) -> str:
+    """Lowercase and collapse whitespace so trivially different queries share a key."""
+    return " ".join(text.lower().split())
+
+
+class PersistentEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that persists vectors in a local SQLite table.
+
+    Each chunk is keyed by ``sha256(model:dimensions|namespace|text)``; only chunks missing
+    from the table are sent to the API, in batches of ``EMBED_BATCH_SIZE`` texts
+    with up to ``EMBED_MAX_CONCURRENCY`` requests in flight.
+    Queries are keyed by their normalized text and served from an in-process LRU
+    backed by the same table, so repeated queries skip the embedding round trip;
+    the query itself is embedded as given, like the documents.
+    """
+
+    def __init__(self, embeddings: Embeddings, namespace: str = ""):
+        self.embeddings = embeddings
+        self.namespace = namespace
+
+    def _key(self, namespace: str, text: str) -> str:
+        model = f"{self.embeddings.model}:{getattr(self.embeddings, 'dimensions', None)}"
+        raw = f"{model}|{namespace}|{text}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        keys = [self._key(self.namespace, text) for text in texts]
+        vectors = _load_vectors(keys)
+
+        missing = [i for i, key in enumerate(keys) if key not in vectors]
+        batches = [missing[start:start + EMBED_BATCH_SIZE] for start in range(0, len(missing), EMBED_BATCH_SIZE)]
+        if batches:
+            # Batches are independent requests, so overlap their round trips
+            with ThreadPoolExecutor(max_workers=min(EMBED_MAX_CONCURRENCY, len(batches))) as executor:
+                results = executor.map(lambda batch: self.embeddings.embed_documents([texts[i] for i in batch]), batches)
+                for batch, new_vectors in zip(batches, results):
+                    for i, vector in zip(batch, new_vectors):
+                        vectors[keys[i]] = vector
+                    _save_vectors([(keys[i], vector) for i, vector in zip(batch, new_vectors)])
+
+        return [vectors[key] for key in keys]
+
+    def embed_query(self, text: str) -> list[float]:
+        # Normalization only widens cache hits; the "query-text" namespace leaves out
+        # vectors cached when the normalized text itself was embedded
+        key = self._key("query-text", normalize_query(text))
+
+        vector = _QUERY_VECTORS.get(key)
+        if vector is None:
+            vector = _load_vectors([key]).get(key)
+            if vector is None:
+                vector = self.embeddings.embed_query(text)
+                _save_vectors([(key, vector)])
+            _QUERY_VECTORS.put(key, vector)
+        return list(vector)
+
+
+@lru_cache(maxsize=None)
+def get_embeddings() -> PersistentEmbeddings:
+    """
+    Get the shared embeddings client wrapped with the query and chunk caches.
+
+    Returns:
+        PersistentEmbeddings: Cached embeddings for the default model
+    """
+    return PersistentEmbeddings(_EMBEDDINGS)
+
+
+def _normalize(vectors) -> np.ndarray:
+    """L2-normalize row vectors as float32 so cosine similarity is a dot product."""
+    matrix = np.asarray(vectors, dtype=np.float32)
+    return matrix / (np.linalg.norm(matrix, axis=-1, keepdims=True) + 1e-12)
+
+
+class NormalizedVectorStore(VectorStore):
+    """
+    Brute-force vector store over a matrix of pre-normalized vectors.
+
+    Vectors are normalized once at insert time and stored as float16, so each
+    query costs one normalization plus a BLAS matrix-vector product per block
+    of ``BRUTE_FORCE_BLOCK_ROWS`` rows upcast to float32.
+    """
+
+    def __init__(self, embedding: Embeddings):
+        self.embedding = embedding
+        self.matrix = np.empty((0, 0), dtype=np.float16)
+        self.documents: list[Document] = []
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding
+
+    def add_embeddings(self, text_embeddings: list[tuple[str, list[float]]], metadatas: Optional[list[dict]] = None) -> list[str]:
+        texts = [text for text, _ in text_embeddings]
+        metadatas = metadatas or [{} for _ in texts]
+        ids = [str(uuid4()) for _ in texts]
+        vectors = _normalize([vector for _, vector in text_embeddings]).astype(np.float16)
+        self.matrix = vectors if not self.documents else np.vstack([self.matrix, vectors])
+        self.documents.extend(
+            Document(id=id_, page_content=text, metadata=metadata)
+            for id_, text, metadata in zip(ids, texts, metadatas)
+        )
+        return ids
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[list[dict]] = None, **kwargs: Any) -> list[str]:
+        texts = list(texts)
+        return self.add_embeddings(list(zip(texts, self.embedding.embed_documents(texts))), metadatas)
+
+    def similarity_search_with_score_by_vector(self, embedding: list[float], k: int = 4) -> list[tuple[Document, float]]:
+        if not self.documents:
+            return []
+        query = _normalize(embedding)
+        scores = np.empty(len(self.matrix), dtype=np.float32)
+        # numpy has no BLAS path for float16, so only one block is upcast at a time
+        for start in range(0, len(self.matrix), BRUTE_FORCE_BLOCK_ROWS):
+            block = self.matrix[start:start + BRUTE_FORCE_BLOCK_ROWS]
+            scores[start:start + len(block)] = block.astype(np.float32) @ query
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.documents[i], float(scores[i])) for i in top]
+
+    def similarity_search_by_vector(self, embedding: list[float], k: int = 4, **kwargs: Any) -> list[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> list[tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self.embedding.embed_query(query), k)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> list[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    def _select_relevance_score_fn(self):
+        return lambda score: score
+
+    @classmethod
+    def from_texts(
+        cls, texts: list[str], embedding: Embeddings, metadatas: Optional[list[dict]] = None, **kwargs: Any
+    ) -> "NormalizedVectorStore":
+        vector_store = cls(embedding)
+        vector_store.add_texts(texts, metadatas)
+        return vector_store
+
+
+def _load_index(path: str):
+    """Read a persisted FAISS index, or None if it is missing or unreadable."""
+    import faiss
+
+    if not os.path.exists(path):
+        return None
+    try:
+        return faiss.read_index(path)
+    except Exception as e:
+        logger.error(f"Error reading index cache {path}: {e}")
+        return None
+
+
+def _save_index(index, path: str) -> None:
+    """Persist a FAISS index, logging instead of failing on errors."""
+    import faiss
+
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write next to the target and rename so readers never see a partial file
+        temp_path = f"{path}.{uuid4().hex}.tmp"
+        faiss.write_index(index, temp_path)
+        os.replace(temp_path, path)
+    except Exception as e:
+        logger.error(f"Error writing index cache {path}: {e}")
+
+
+def build_vector_store(documents: list[Document], embeddings: Embeddings, index_path: Optional[str] = None) -> VectorStore:
+    """
+    Index documents with FAISS, or in a numpy matrix when faiss is missing.
+
+    Small corpora use an exact inner-product index, stored as int8 scalar
+    quantized vectors from ``SQ_MIN_VECTORS`` chunks on; from
+    ``HNSW_MIN_VECTORS`` chunks on, an approximate HNSW graph over int8
+    vectors keeps search sub-linear.
+
+    Args:
+        documents: Chunks to index
+        embeddings: Embeddings used for the chunks and for later queries
+        index_path: File the FAISS index is persisted to; when it already
+            holds an index for these chunks, embedding and building are skipped
+
+    Returns:
+        VectorStore: Populated vector store
+    """
+    try:
+        import faiss
+        from langchain_community.docstore.in_memory import InMemoryDocstore
+        from langchain_community.vectorstores import FAISS
+        from langchain_community.vectorstores.utils import DistanceStrategy
+    except ImportError:
+        faiss = None
+
+    if faiss is None:
+        logger.warning("faiss is not installed, using brute-force similarity search")
+        texts = [doc.page_content for doc in documents]
+        vector_store = NormalizedVectorStore(embeddings)
+        vector_store.add_embeddings(list(zip(texts, embeddings.embed_documents(texts))), [doc.metadata for doc in documents])
+        return vector_store
+
+    use_hnsw = len(documents) >= HNSW_MIN_VECTORS
+    index = _load_index(index_path) if index_path else None
+    if index is not None and index.ntotal != len(documents):
+        index = None
+
+    if index is None:
+        # Unit-length vectors make inner product rank like cosine, and L2 too for HNSW
+        vectors = _normalize(embeddings.embed_documents([doc.page_content for doc in documents]))
+        dimensions = vectors.shape[1]
+        if use_hnsw:
+            # Graph nodes hold one byte per component instead of four
+            index = faiss.IndexHNSWSQ(dimensions, faiss.ScalarQuantizer.QT_8bit, HNSW_M)
+            index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+            index.train(vectors)
+        elif len(documents) < SQ_MIN_VECTORS:
+            index = faiss.IndexFlatIP(dimensions)
+        else:
+            # Learns each dimension's value range, then stores one byte per component
+            index = faiss.IndexScalarQuantizer(dimensions, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT)
+            index.train(vectors)
+        index.add(vectors)
+        if index_path:
+            _save_index(index, index_path)
+
+    ids = [str(position) for position in range(len(documents))]
+    docstore = InMemoryDocstore({
+        id_: Document(id=id_, page_content=doc.page_content, metadata=doc.metadata)
+        for id_, doc in zip(ids, documents)
+    })
+    if use_hnsw:
+        index.hnsw.efSearch = HNSW_EF_SEARCH
+        # Queries are normalized too, so L2 ranking matches cosine ranking
+        return FAISS(embeddings, index, docstore, dict(enumerate(ids)), normalize_L2=True)
+    return FAISS(embeddings, index, docstore, dict(enumerate(ids)), distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT)
+
+
+def _merge_small_chunks(
+    chunks: list[Document],
+    max_size: int,
+    length_function: Callable[[str], int] = len,
+) -> list[Document]:
+    """
+    Merge neighbouring chunks of the same source while they fit in ``max_size``.
+
+    Args:
+        chunks: Chunks in document order
+        max_size: Maximum length of a merged chunk
+        length_function: Measures a chunk's length (characters by default)
+
+    Returns:
+        list[Document]: Chunks with undersized neighbours combined
+    """
+    merged: list[Document] = []
+    for chunk in chunks:
+        previous = merged[-1] if merged else None
+        if (
+            previous is not None
+            and previous.metadata == chunk.metadata
+            and length_function(previous.page_content + "\n" + chunk.page_content) <= max_size
+        ):
+            previous.page_content += "\n" + chunk.page_content
+        else:
+            merged.append(chunk)
+    return merged
+
+
+def _dedupe_chunks(chunks: list[Document]) -> list[Document]:
+    """Drop chunks whose text repeats an earlier chunk, keeping document order."""
+    seen: set[str] = set()
+    unique: list[Document] = []
+    for chunk in chunks:
+        digest = hashlib.sha1(chunk.page_content.strip().encode("utf-8")).hexdigest()
+        if digest not in seen:
+            seen.add(digest)
+            unique.append(chunk)
+    return unique
+
+
+def _split_documents(docs: list[Document], chunk_size: int, chunk_overlap: int) -> list[Document]:
+    """
+    Split documents into overlapping chunks by token count.
+
+    Uses the Rust ``semantic-text-splitter`` when installed (with its built-in
+    tiktoken tokenizer, never a Python callback), otherwise LangChain's
+    ``RecursiveCharacterTextSplitter`` measuring length with ``tiktoken``.
+
+    Args:
+        docs: Documents to split
+        chunk_size: Maximum tokens per chunk
+        chunk_overlap: Tokens shared between neighbouring chunks
+
+    Returns:
+        list[Document]: Chunks carrying their source document's metadata
+    """
+    try:
+        from semantic_text_splitter import TextSplitter
+    except ImportError:
+        import tiktoken
+
+        encoding = tiktoken.encoding_for_model(CHUNK_TOKENIZER_MODEL)
+
+        def count_tokens(text: str) -> int:
+            return len(encoding.encode(text, disallowed_special=()))
+
+        text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            length_function=count_tokens,
+            separators=CHUNK_SEPARATORS,
+        )
+        chunks = text_splitter.split_documents(docs)
+        # Small trailing pieces waste an embedding and a retrieval slot each
+        return _merge_small_chunks(chunks, chunk_size + chunk_overlap, count_tokens)
+
+    # The Rust splitter packs chunks to capacity, so there is nothing left to merge
+    splitter = TextSplitter.from_tiktoken_model(CHUNK_TOKENIZER_MODEL, chunk_size, overlap=chunk_overlap)
+    return [
+        Document(page_content=chunk, metadata=dict(doc.metadata))
+        for doc in docs
+        for chunk in splitter.chunks(doc.page_content)
+    ]
+
+
+@lru_cache(maxsize=None)
+def get_vector_store(
+    source_filename: str,
+    embedding_model: str = EMBEDDING_MODEL,
+    embedding_dimensions: int = EMBEDDING_DIMENSIONS,
+    chunk_size: int = CHUNK_SIZE,
+    chunk_overlap: int = CHUNK_OVERLAP,
+) -> VectorStore:
+    """
+    Load, split and embed a source file from the data directory.
+
+    Chunks, their vectors and the built FAISS index are cached on disk under
+    keys made of the file name and a hash of its content, so editing the file
+    invalidates them while touching or redeploying an unchanged file does not.
+    A restart with an unchanged file loads the index without embedding anything.
+
+    Args:
+        source_filename: Name of the file inside ``data/``
+        embedding_model: Embedding model the store is built with
+        embedding_dimensions: Length the embedding vectors are shortened to
+        chunk_size: Maximum tokens per chunk
+        chunk_overlap: Tokens shared between neighbouring chunks
+
+    Returns:
+        VectorStore: Vector store holding every chunk of the file
+    """
+    try:
+        source_path = f"data/{source_filename}"
+        if (embedding_model, embedding_dimensions) == (EMBEDDING_MODEL, EMBEDDING_DIMENSIONS):
+            client = _EMBEDDINGS
+        else:
+            client = _create_embeddings(embedding_model, embedding_dimensions)
+        with open(source_path, "rb") as f:
+            content = f.read()
+        content_hash = hashlib.sha256(content).hexdigest()
+        embeddings = PersistentEmbeddings(client, namespace=f"{source_filename}|{content_hash}")
+
+        # Chunks depend only on the file content and the chunking settings
+        split_key = f"{source_filename}|{content_hash}|{CHUNK_TOKENIZER_MODEL}|{chunk_size}|{chunk_overlap}"
+        all_splits = _load_splits(split_key)
+        if all_splits is None:
+            docs = [Document(page_content=content.decode("utf-8"), metadata={"source": source_path})]
+            all_splits = _split_documents(docs, chunk_size, chunk_overlap)
+            _save_splits(split_key, all_splits)
+        # Repeated boilerplate would cost an embedding and a retrieval slot per copy
+        all_splits = _dedupe_chunks(all_splits)
+
+        # The index depends on the chunks, the embedding model and the index settings
+        index_key = (
+            f"{split_key}|{embedding_model}|{embedding_dimensions}"
+            f"|{SQ_MIN_VECTORS}|{HNSW_MIN_VECTORS}|{HNSW_M}|{HNSW_EF_CONSTRUCTION}|sq8"
+        )
+        index_path = os.path.join(INDEX_CACHE_DIR, f"{hashlib.sha256(index_key.encode()).hexdigest()}.faiss")
+        return build_vector_store(all_splits, embeddings, index_path)
+    except Exception as e:
+        logger.error(f"Error building vector store for {source_filename}: {e}")
+        raise
+
+
+async def preload_vector_stores(source_filenames: Iterable[str]) -> None:
+    """
+    Build the vector stores of several sources concurrently.
+
+    Each store is built in a worker thread, so the sources' embedding requests
+    overlap instead of running one source after another. Failures are logged
+    and left for the first query to retry.
+
+    Args:
+        source_filenames: Names of files inside ``data/``; missing files are skipped
+    """
+    names = [name for name in source_filenames if os.path.exists(f"data/{name}")]
+    results = await asyncio.gather(
+        *(asyncio.to_thread(get_vector_store, name) for name in names), return_exceptions=True
+    )
+    for name, result in zip(names, results):
+        if isinstance(result, Exception):
+            logger.error(f"Error preloading vector store for {name}: {result}")
+
+
+@lru_cache(maxsize=None)
+def _get_reranker(model_name: str):
+    """
+    Load a cross-encoder reranker, or None when sentence-transformers is missing.
+
+    Args:
+        model_name: Hugging Face cross-encoder model name
+
+    Returns:
+        CrossEncoder | None: Loaded reranker
+    """
+    try:
+        from sentence_transformers import CrossEncoder
+    except ImportError:
+        logger.warning("sentence-transformers is not installed, retrieval results are not reranked")
+        return None
+    return CrossEncoder(model_name)
+
+
+class RerankingRetriever(BaseRetriever):
+    """Retriever that over-fetches candidates and keeps the cross-encoder's best."""
+
+    vector_store: VectorStore
+    reranker: Any
+    fetch_k: int = RERANK_FETCH_K
+    top_n: int = RERANK_TOP_N
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> list[Document]:
+        candidates = self.vector_store.similarity_search(query, k=self.fetch_k)
+        if len(candidates) <= 1:
+            return candidates
+        scores = np.asarray(self.reranker.predict([(query, doc.page_content) for doc in candidates]))
+        return [candidates[i] for i in np.argsort(-scores)[:self.top_n]]
+
+
+class PrefixedRetriever(BaseRetriever):
+    """Retriever that prepends a fixed context phrase to every query."""
+
+    retriever: BaseRetriever
+    query_prefix: str
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> list[Document]:
+        return self.retriever.invoke(f"{self.query_prefix}{query}", config={"callbacks": run_manager.get_child()})
+
+    async def _aget_relevant_documents(self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun) -> list[Document]:
+        return await self.retriever.ainvoke(f"{self.query_prefix}{query}", config={"callbacks": run_manager.get_child()})
+
+
+class QueryCachedRetriever(BaseRetriever):
+    """
+    Retriever that serves repeated queries from an in-memory LRU.
+
+    Results are keyed by the normalized query text. The corpus behind a
+    retriever never changes within a process, so a cached result stays valid.
+    """
+
+    retriever: BaseRetriever
+    _cache: LRUCache = PrivateAttr(default_factory=lambda: LRUCache(RESULT_CACHE_SIZE))
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> list[Document]:
+        key = normalize_query(query)
+        documents = self._cache.get(key)
+        if documents is None:
+            documents = self.retriever.invoke(query, config={"callbacks": run_manager.get_child()})
+            self._cache.put(key, documents)
+        return list(documents)
+
+    async def _aget_relevant_documents(self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun) -> list[Document]:
+        key = normalize_query(query)
+        documents = self._cache.get(key)
+        if documents is None:
+            documents = await self.retriever.ainvoke(query, config={"callbacks": run_manager.get_child()})
+            self._cache.put(key, documents)
+        return list(documents)
+
+
+class ThreadCachedRetriever(BaseRetriever):
+    """
+    Retriever that reuses results for repeated queries within one conversation.
+
+    Results are cached per LangGraph ``thread_id`` (read from the run config), so
+    nothing leaks between users. A query whose embedding has cosine similarity of
+    at least ``similarity_threshold`` to a cached query in the same thread is
+    answered from that entry. Runs without a ``thread_id`` are not cached.
+    """
+
+    retriever: BaseRetriever
+    embeddings: Embeddings
+    maxsize: int = THREAD_CACHE_SIZE
+    similarity_threshold: float = THREAD_CACHE_SIMILARITY
+    _threads: LRUCache = PrivateAttr(default_factory=lambda: LRUCache(THREAD_CACHE_THREADS))
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    @staticmethod
+    def _thread_id() -> Optional[str]:
+        return ensure_config().get("configurable", {}).get("thread_id")
+
+    def _lookup(self, thread_id: str, query: str, vector: np.ndarray) -> Optional[list[Document]]:
+        with self._lock:
+            entries = self._threads.get(thread_id)
+            if not entries:
+                return None
+            key = normalize_query(query)
+            if key not in entries:
+                keys = list(entries)
+                similarities = np.stack([entries[k][0] for k in keys]) @ vector
+                best = int(np.argmax(similarities))
+                if similarities[best] < self.similarity_threshold:
+                    return None
+                key = keys[best]
+            entries.move_to_end(key)
+            return entries[key][1]
+
+    def _store(self, thread_id: str, query: str, vector: np.ndarray, documents: list[Document]) -> None:
+        with self._lock:
+            entries = self._threads.get(thread_id)
+            if entries is None:
+                entries = OrderedDict()
+                self._threads.put(thread_id, entries)
+            entries[normalize_query(query)] = (vector, documents)
+            while len(entries) > self.maxsize:
+                entries.popitem(last=False)
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> list[Document]:
+        thread_id = self._thread_id()
+        if thread_id is None:
+            return self.retriever.invoke(query, config={"callbacks": run_manager.get_child()})
+
+        # The store embeds the same query again, which is served from the query LRU
+        vector = _normalize(self.embeddings.embed_query(query))
+        documents = self._lookup(thread_id, query, vector)
+        if documents is None:
+            documents = self.retriever.invoke(query, config={"callbacks": run_manager.get_child()})
+            self._store(thread_id, query, vector, documents)
+        return documents
+
+    async def _aget_relevant_documents(self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun) -> list[Document]:
+        thread_id = self._thread_id()
+        if thread_id is None:
+            return await self.retriever.ainvoke(query, config={"callbacks": run_manager.get_child()})
+
+        vector = _normalize(await self.embeddings.aembed_query(query))
+        documents = self._lookup(thread_id, query, vector)
+        if documents is None:
+            documents = await self.retriever.ainvoke(query, config={"callbacks": run_manager.get_child()})
+            self._store(thread_id, query, vector, documents)
+        return documents
+
+
+class SemanticCachedRetriever(ThreadCachedRetriever):
+    """
+    Retriever that reuses results for near-identical queries across conversations.
+
+    The knowledge base is the same for every user, so one shared LRU of
+    ``maxsize`` queries serves all threads; a query whose embedding has cosine
+    similarity of at least ``similarity_threshold`` to a cached query is
+    answered from that entry.
+    """
+
+    maxsize: int = SEMANTIC_CACHE_SIZE
+    similarity_threshold: float = SEMANTIC_CACHE_SIMILARITY
+
+    @staticmethod
+    def _thread_id() -> Optional[str]:
+        return "shared"
+
+
+class LazyRetriever(BaseRetriever):
+    """
+    Retriever that builds its underlying retriever on first use.
+
+    Importing an agent then costs no file I/O or embedding calls; the source is
+    only indexed when its retriever tool is first called. Building is guarded by
+    a lock so concurrent first calls index the source once.
+    """
+
+    factory: Callable[[], BaseRetriever]
+    _retriever: Optional[BaseRetriever] = PrivateAttr(default=None)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    def get(self) -> BaseRetriever:
+        if self._retriever is None:
+            with self._lock:
+                if self._retriever is None:
+                    self._retriever = self.factory()
+        return self._retriever
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> list[Document]:
+        return self.get().invoke(query, config={"callbacks": run_manager.get_child()})
+
+    async def _aget_relevant_documents(self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun) -> list[Document]:
+        # The first call indexes the source, which blocks; keep it off the event loop
+        retriever = self._retriever or await asyncio.to_thread(self.get)
+        return await retriever.ainvoke(query, config={"callbacks": run_manager.get_child()})
+
+
+@lru_cache(maxsize=None)
+def get_retriever(
+    source_filename: str,
+    k: int = 3,
+    query_prefix: str = "",
+    thread_cache: bool = False,
+    semantic_cache: bool = False,
+):
+    """
+    Get a similarity retriever over a source file.
+
+    The vector store is built lazily, the first time the retriever is queried.
+    Results are cached per normalized query (see ``QueryCachedRetriever``).
+
+    When ``RERANKER_MODEL`` is configured (and sentence-transformers is
+    installed), ``RERANK_FETCH_K`` candidates are reranked by a cross-encoder
+    and only the best ``RERANK_TOP_N`` are returned, instead of ``k``.
+
+    A ``query_prefix`` expands short queries deterministically (e.g. "power
+    outage" becomes "Electrical emergency safety procedure for: power outage")
+    so the model does not have to rewrite them itself.
+
+    With ``thread_cache`` enabled, results are cached per conversation and
+    near-identical queries in the same thread skip the vector search (see
+    ``ThreadCachedRetriever``). With ``semantic_cache`` enabled, near-identical
+    queries from any conversation share results instead (see
+    ``SemanticCachedRetriever``).
+
+    Args:
+        source_filename: Name of the file inside ``data/``
+        k: Number of chunks returned per query
+        query_prefix: Text prepended to every query before embedding
+        thread_cache: Whether to cache results per conversation thread
+        semantic_cache: Whether to cache results across conversations by query similarity
+
+    Returns:
+        BaseRetriever: Retriever backed by the shared vector store
+    """
+    return LazyRetriever(
+        factory=partial(_build_retriever, source_filename, k, query_prefix, thread_cache, semantic_cache)
+    )
+
+
+def _build_retriever(
+    source_filename: str, k: int, query_prefix: str, thread_cache: bool, semantic_cache: bool
+) -> BaseRetriever:
+    """Build the retriever described by ``get_retriever``."""
+    vector_store = get_vector_store(source_filename)
+    reranker = _get_reranker(config.RERANKER_MODEL) if config.RERANKER_MODEL else None
+    if reranker is not None:
+        retriever = RerankingRetriever(vector_store=vector_store, reranker=reranker)
+    else:
+        retriever = vector_store.as_retriever(search_type="similarity", search_kwargs={"k": k})
+    retriever = QueryCachedRetriever(retriever=retriever)
+    # Inside the prefix wrapper, so the cache embeds exactly the query the store searches with
+    if semantic_cache:
+        retriever = SemanticCachedRetriever(retriever=retriever, embeddings=get_embeddings())
+    elif thread_cache:
+        retriever = ThreadCachedRetriever(retriever=retriever, embeddings=get_embeddings())
+    if query_prefix:
+        retriever = PrefixedRetriever(retriever=retriever, query_prefix=query_prefix)
+    return retriever
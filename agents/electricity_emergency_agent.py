@@ -1,55 +1,42 @@
 import logging
-from langchain_community.document_loaders import TextLoader
 from dotenv import load_dotenv
 from langchain.tools.retriever import create_retriever_tool
-from langchain_openai import ChatOpenAI
-from langchain_openai import OpenAIEmbeddings
-from langchain_core.vectorstores import InMemoryVectorStore
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langgraph.graph import MessagesState, StateGraph, START, END
+from langgraph.graph import StateGraph, START, END
 from langgraph.prebuilt import tools_condition
-from langgraph.checkpoint.mongodb import MongoDBSaver
 from langchain_core.tools import tool
-from langchain_core.messages import ToolMessage
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.messages import AIMessage, SystemMessage
 from configurations.config import config
 from configurations.db import mongodb_client
-from utils.message_formatter import format_conversation_messages
 from utils.database_utils import save_electricity_emergency
 from agents.schemas.agent_schemas import ElectricityEmergencySchema
-
-# Configure logging
-logging.basicConfig(
-    level=logging.ERROR,  # Only log errors and above
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler("electricity_emergency.log"),
-        logging.StreamHandler()
-    ]
-)
+from agents._retriever_cache import get_retriever
+from agents._llm import get_llm, get_llm_with_tools, trim_history
+from agents._checkpointer import BatchingMongoDBSaver
+from agents._case_state import CaseState, CaseTools
+from agents._greetings import greeting_language
+from agents.prompts.base import build_emergency_prompt
+from agents.prompts.extraction import ELECTRICITY_EXTRACTION_INSTRUCTIONS
+
+# Logging is configured once at application entry (configurations/logging_config.py)
 logger = logging.getLogger(__name__)
 
 # Load environment variables
 load_dotenv()
 
-# Initialize embeddings, vector store, and retriever
+# Initialize retriever (shared across agents, indexed on first use)
 try:
-    embeddings = OpenAIEmbeddings(model="text-embedding-3-large")
-    vector_store = InMemoryVectorStore(embeddings)
-
-    loader = TextLoader(f"data/{config.SOURCE_FILENAME_ELECTRICITY}", encoding="utf-8")
-    docs = loader.load()
-
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=150)
-    all_splits = text_splitter.split_documents(docs)
-
-    _ = vector_store.add_documents(documents=all_splits)
-    retriever = vector_store.as_retriever(search_type="similarity", search_kwargs={"k": 3})
+    retriever = get_retriever(
+        config.SOURCE_FILENAME_ELECTRICITY,
+        query_prefix="Electrical emergency safety procedure for: ",
+        thread_cache=True,
+    )
 except Exception as e:
     logger.error(f"Error during initialization: {e}")
     raise
 
-# Initialize LLM
-llm = ChatOpenAI(model="gpt-4o-mini")
+# Initialize LLM (shared client)
+llm = get_llm()
 
 electricity_emergency_info_retriever = create_retriever_tool(
     retriever,
@@ -57,69 +44,17 @@ electricity_emergency_info_retriever = create_retriever_tool(
     "Searches information about electrical emergencies, power outages, electrical safety protocols, and emergency electrical procedures. Takes in a query and finds relevant electrical emergency context to answer emergency situations.",
 )
 
-def submit_electricity_case(state: MessagesState):
-    """
-    Submit electricity emergency case to database
-    
-    Args:
-        state: Current agent state with conversation history
-        
-    Returns:
-        dict: Submission result
-    """
-    # Extract information from conversation history
-    messages = state.get("messages", [])
-    
-    # Format conversation for processing
-    formatted_conversation = format_conversation_messages(state)
-    print("-------------")
-    print("formatted_conversation", formatted_conversation)
-    print("-------------")
-    
-    try:
-        # Use LLM with structured output to extract data from conversation
-        structured_llm = llm.with_structured_output(ElectricityEmergencySchema)
-        
-        # Create prompt for data extraction
-        extraction_prompt = f"""
-        Extract electricity emergency information from the following conversation and structure it according to the ElectricityEmergencySchema.
-        
-        Conversation:
-        {formatted_conversation}
-        
-        Please extract the following information:
-        - Reporter name, phone number
-        - Location address
-        - Type of issue (power outage, transformer issue, broken electric pole, etc.)
-        - Severity level (hazardous, major outage, minor)
-        - Time issue started
-        - Description of the problem
-        
-        If any information is not available in the conversation, leave it as null.
-        """
-        
-        # Extract structured data using LLM
-        electricity_data = structured_llm.invoke(extraction_prompt)
-        
-        # Save to database
-        user_id = "default_user"  # In real implementation, this would come from authentication
-        case_id = save_electricity_emergency(user_id, electricity_data)
-        
-        print(f"Electricity emergency case saved to database with ID: {case_id}")
-        
-        return {
-            "status": "submitted",
-            "case_id": case_id,
-            "message": "Electricity emergency case has been submitted successfully. Utility department has been notified."
-        }
-        
-    except Exception as e:
-        logger.error(f"Error submitting electricity emergency case: {e}")
-        return {
-            "status": "error",
-            "case_id": None,
-            "message": f"Failed to submit electricity emergency case: {str(e)}"
-        }
+# Fields that must be recorded before a case can be submitted without LLM extraction
+REQUIRED_FIELDS = ("reporter_name", "reporter_phone", "location", "issue_type", "severity", "time_started")
+
+# Structured extraction is bound and the prompt parsed once, not per submission
+structured_llm = llm.with_structured_output(ElectricityEmergencySchema)
+# Static instructions first so repeated extractions share a cacheable prompt prefix
+extraction_prompt = ChatPromptTemplate.from_messages([
+    ("system", ELECTRICITY_EXTRACTION_INSTRUCTIONS),
+    MessagesPlaceholder("conversation"),
+])
+extraction_chain = extraction_prompt | structured_llm
 
 @tool
 def submit_case():
@@ -141,61 +76,41 @@ def submit_case():
     # This tool will be handled by the custom tool node
     return {"status": "Submitted"}
 
+# Tool node and submission shared with the other emergency agents
+case_tools = CaseTools(
+    schema=ElectricityEmergencySchema,
+    case_kind="electricity emergency",
+    required_fields=REQUIRED_FIELDS,
+    extraction_chain=extraction_chain,
+    save=save_electricity_emergency,
+    notified="Utility department has been notified.",
+    retriever_tool=electricity_emergency_info_retriever,
+)
+
 # Define tools
-tools = [electricity_emergency_info_retriever, submit_case]
-tools_by_name = {t.name: t for t in tools}
+tools = [electricity_emergency_info_retriever, case_tools.record_tool, submit_case]
 
 try:
-    llm_with_tools = llm.bind_tools(tools)
+    llm_with_tools = get_llm_with_tools(tools)
 except Exception as e:
     logger.error(f"Error binding tools: {e}")
     raise
 
-sys_msg = """
-You are an Electrical Emergency Response Assistant specialized in providing immediate electrical safety guidance and emergency protocols. Your role is to help users during electrical emergencies by providing clear, accurate, and actionable electrical safety information to ensure the best possible outcome in critical electrical situations.
-
-#Tone:
-- Calm and reassuring
-- Professional and authoritative
-- Urgent when necessary
-- Safety-focused and methodical
-
-#Important Guidelines:
-- If the user greets you, respond warmly and introduce yourself as an Electrical Emergency Assistant.
-- CRITICAL: You are a MULTI-LINGUAL assistant. You MUST respond in the EXACT SAME LANGUAGE that the user is using.
-- Detect the user's language automatically and respond accordingly (English, Spanish, French, German, Italian, Portuguese, Arabic, Chinese, Japanese, Korean, Hindi, etc.).
-- Always provide accurate and context-based electrical safety information in the user's language.
-- If the user's question is not related to electrical emergencies or electrical safety, respond politely in their language:
-'[Translated to user's language] I am specialized in electrical emergency assistance. For non-electrical questions, please contact appropriate services. How can I help with your electrical emergency?'
-- If the user's question is unclear or lacks critical details, ask for more specific information about the electrical situation in their language.
-- Focus on collecting all required information to connect them with professional electrical utility help.
-- Always reassure the user that you are working to connect them with professional electrical utility assistance.
-- Your responses should emphasize that you are gathering information to ensure they get the right professional help.
-- Give precise and concise electrical safety guidance while collecting information. Avoid unnecessary information that could delay response.
-- Always use appropriate emojis for electrical emergency contexts:
-Electrical Systems
-⚡ 🔌 🔋 ⚡️ 💡 🏭
-Emergency Response
-🚨 ⚠️ 🆘 🏃‍♂️ 📞 🔥
-Safety and Hazards
-🛡️ ⚠️ 🚫 💥 ⚡ 🔥
-Tools and Equipment
-🔧 ⚒️ 🔨 🛠️ 📏 🔍
-Support and Guidance
-🤗 🙏 💪 🌟 🛡️ 💖
-Time and Urgency
-⏰ ⚡ 🚀 🎯 📍 🗺️
-
-#Critical Electrical Emergency Protocols:
-- Focus on gathering all required information quickly and efficiently
-- Provide immediate electrical safety guidance while collecting information
-- Always reassure users that professional electrical utility help is being arranged
-- Emphasize that you are working to connect them with the right electrical utility professionals
-- Remind users that you are coordinating their case with emergency electrical utility services
-
-#Required Information Collection:
-You MUST collect the following information from users to prepare comprehensive reports for electricity department:
-
+# Static prompt kept byte-identical across calls so OpenAI can reuse its cached prefix
+sys_msg = build_emergency_prompt(
+    record_details=True,
+    intro="You are an Electrical Emergency Response Assistant specialized in providing immediate electrical safety guidance and emergency protocols. Your role is to help users during electrical emergencies by providing clear, accurate, and actionable electrical safety information to ensure the best possible outcome in critical electrical situations.",
+    tone_focus="Safety-focused and methodical",
+    assistant_name="an Electrical Emergency Assistant",
+    topic="electrical safety",
+    scope="electrical emergencies or electrical safety",
+    decline="I am specialized in electrical emergency assistance. For non-electrical questions, please contact appropriate services. How can I help with your electrical emergency?",
+    situation="electrical",
+    service="electrical utility",
+    emojis="⚡ 🔌 🔋 💡 🏭 🚨 ⚠️ 🆘 🏃‍♂️ 📞 🔥 🛡️ 🚫",
+    protocols_title="Critical Electrical Emergency Protocols",
+    report_audience="electricity department",
+    required_information="""\
 **Reporter Details:**
 - Name, phone number, email (optional)
 
@@ -214,102 +129,60 @@ You MUST collect the following information from users to prepare comprehensive r
 - For outage tracking
 
 **Photos/Videos:**
-- Broken wires, burnt meters, sparks (optional but very useful)
-
-**Collection Strategy:**
-- Ask for information systematically and clearly
-- Prioritize critical information first (location, issue type, severity)
-- Use follow-up questions to gather complete details
-- Confirm all collected information before proceeding
-
-#Must Do:
-- CRITICAL: You are MULTI-LINGUAL. You MUST respond in the EXACT SAME LANGUAGE that the user is using.
-- Detect the user's language automatically and respond accordingly (English, Spanish, French, German, Italian, Portuguese, Arabic, Chinese, Japanese, Korean, Hindi, etc.).
-- If the tool cannot retrieve relevant information on the first attempt, call it again with a different electrical query.
-- ALWAYS collect the required information fields listed above before providing final guidance.
- 
-Tool Usage:
-- Use the Electricity Emergency Info Retriever tool to search for electrical emergency information, safety procedures, and emergency protocols.
-- Always use this tool to retrieve electrical information to answer emergency queries.
-- If the tool cannot retrieve relevant information on the first attempt, call it again with a different electrical query.
-- This tool requires the argument `query`. Make sure to pass detailed electrical queries to it. If a user gives a short query, convert it into a detailed electrical query.
-For example: if the user asks "power outage", convert it into "What should I do during a power outage and electrical safety precautions?"
-- If the user's question is in a non-English language, translate it to English for the tool query, then provide the response in the user's original language.
-- Use the retrieved information to answer electrical queries accurately and concisely.
-- Don't provide electrical advice beyond your training data.
-- Don't explain your internal workings or tools.
-- If the tool provides extra information, only use the specific information relevant to the electrical emergency.
-- For follow-up electrical questions, ensure tool calls consider the context of prior electrical interactions.
+- Broken wires, burnt meters, sparks (optional but very useful)""",
+    priority="location, issue type, severity",
+    retriever_title="Electricity Emergency Info Retriever",
+    retriever_topics="electrical emergency information, safety procedures, and emergency protocols",
+    query_kind="electrical",
+    query_instructions="Pass the user's electrical problem as the query.",
+    case_kind="electrical emergency",
+    submit_requirements="all reporter details, location, issue type, severity level, time started, and media attachments",
+)
 
-Case Submission:
-- Use the `submit_case` tool ONLY when you have collected ALL required information fields listed above.
-- This tool will submit the complete electricity emergency case and connect them with professional electrical utility help.
-- Do NOT call this tool until all reporter details, location, issue type, severity level, time started, and media attachments have been gathered.
-- After calling this tool, confirm to the user that their case has been submitted and that professional electrical utility assistance is being coordinated for them.
+# Parse the system prompt into a message once instead of on every call
+SYS_MSG = SystemMessage(content=sys_msg)
 
-Response Language:
-CRITICAL: You are MULTI-LINGUAL. You MUST respond in the EXACT SAME LANGUAGE that the user is using. Detect the user's language automatically and respond accordingly (English, Spanish, French, German, Italian, Portuguese, Arabic, Chinese, Japanese, Korean, Hindi, etc.).
-"""
+# Replies to a conversation that opens with a bare greeting, by language
+GREETING_REPLIES = {
+    "en": "Hello! ⚡ I am your Electrical Emergency Assistant. I can guide you through electrical safety steps and connect you with your electricity utility. What electrical problem are you facing right now?",
+    "es": "¡Hola! ⚡ Soy tu Asistente de Emergencias Eléctricas. Puedo guiarte con medidas de seguridad eléctrica y ponerte en contacto con tu compañía eléctrica. ¿Qué problema eléctrico tienes en este momento?",
+}
 
-def generate(state: MessagesState):
+async def generate(state: CaseState):
     """
     Generates a response based on the user's message history.
 
+    Runs asynchronously so that, under ``astream(stream_mode="messages")``,
+    tokens reach the client while the completion is still being generated.
+
     Parameters:
-        state (MessagesState): The state of the conversation, containing past messages.
+        state (CaseState): The state of the conversation, containing past messages.
 
     Returns:
         dict: A dictionary containing the generated message.
     """
     try:
-        return {"messages": [llm_with_tools.invoke([sys_msg] + state["messages"][-6:])]}
+        # A conversation that opens with a bare greeting needs no model call
+        if len(state["messages"]) == 1:
+            language = greeting_language(state["messages"][0].content)
+            if language is not None:
+                return {"messages": [AIMessage(content=GREETING_REPLIES[language])]}
+
+        return {"messages": [await llm_with_tools.ainvoke([SYS_MSG, *trim_history(state["messages"])])]}
     except Exception as e:
         logger.error(f"Error during response generation: {e}")
         raise
 
-def custom_tool_node(state: MessagesState):
-    """
-    Custom tool node that can access the agent's state and handle tools accordingly.
-    """
-    results: list[ToolMessage] = []
-    
-    # Get the last AI message which may contain tool calls
-    ai_msg = state["messages"][-1]
-    
-    if not hasattr(ai_msg, "tool_calls"):
-        return {"messages": results}
-    
-    for call in ai_msg.tool_calls:
-        tool_name = call["name"]
-        args = call["args"]
-        tool_call_id = call["id"]
-        
-        if tool_name == "submit_case":
-            # Handle submit_case with access to full state
-            result = submit_electricity_case(state)
-            results.append(ToolMessage(
-                content=f"Case submitted successfully. Case ID: {result['case_id']}. {result['message']}", 
-                tool_call_id=tool_call_id
-            ))
-        else:
-            # Handle other tools normally
-            tool_fn = tools_by_name.get(tool_name)
-            if tool_fn is not None:
-                observation = tool_fn.invoke(args)
-                results.append(ToolMessage(content=str(observation), tool_call_id=tool_call_id))
-    
-    return {"messages": results}
-
 # Build graph
 try:
-    graph_builder = StateGraph(MessagesState)
+    graph_builder = StateGraph(CaseState)
     graph_builder.add_node("generate", generate)
-    graph_builder.add_node("tools", custom_tool_node)
+    graph_builder.add_node("tools", case_tools.tool_node)
     graph_builder.add_edge(START, "generate")
     graph_builder.add_conditional_edges("generate", tools_condition)
     graph_builder.add_edge("tools", "generate")
 
-    memory = MongoDBSaver(mongodb_client)
+    memory = BatchingMongoDBSaver(mongodb_client)
     electricity_emergency_graph = graph_builder.compile(checkpointer=memory)
 except Exception as e:
     logger.error(f"Error building state graph: {e}")
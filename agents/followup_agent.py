@@ -1,31 +1,24 @@
+import asyncio
 import logging
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
 from langgraph.graph import MessagesState, StateGraph, START, END
 from langgraph.prebuilt import tools_condition
-from langgraph.checkpoint.mongodb import MongoDBSaver
 from langchain_core.tools import tool
 from langchain_core.messages import ToolMessage
 from configurations.db import mongodb_client
 from utils.database_utils import update_emergency_status, get_emergency_report_by_id
 from models.database_models import EmergencyStatus
+from agents._llm import get_llm, get_llm_with_tools, trim_history
+from agents._checkpointer import BatchingMongoDBSaver
 
-# Configure logging
-logging.basicConfig(
-    level=logging.ERROR,  # Only log errors and above
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler("followup_agent.log"),
-        logging.StreamHandler()
-    ]
-)
+# Logging is configured once at application entry (configurations/logging_config.py)
 logger = logging.getLogger(__name__)
 
 # Load environment variables
 load_dotenv()
 
-# Initialize LLM
-llm = ChatOpenAI(model="gpt-4o-mini")
+# Initialize LLM (shared client)
+llm = get_llm()
 
 def resolve_emergency_case(emergency_id: str, emergency_type: str):
     """
@@ -38,6 +31,12 @@ def resolve_emergency_case(emergency_id: str, emergency_type: str):
     Returns:
         dict: Resolution result
     """
+    if not emergency_id or not emergency_type:
+        return {
+            "status": "error",
+            "message": "Error: Missing emergency_id or emergency_type parameters"
+        }
+    
     try:
         # Update status to resolved
         success = update_emergency_status(emergency_id, emergency_type, EmergencyStatus.RESOLVED)
@@ -82,7 +81,7 @@ tools = [mark_case_resolved]
 tools_by_name = {t.name: t for t in tools}
 
 try:
-    llm_with_tools = llm.bind_tools(tools)
+    llm_with_tools = get_llm_with_tools(tools)
 except Exception as e:
     logger.error(f"Error binding tools: {e}")
     raise
@@ -150,7 +149,7 @@ You MUST collect the following information to properly resolve the case:
 Respond in the same language as the user's query - English for English queries, Spanish for Spanish queries.
 """
 
-def generate(state: MessagesState):
+async def generate(state: MessagesState):
     """
     Generates a response based on the user's message history.
 
@@ -161,52 +160,41 @@ def generate(state: MessagesState):
         dict: A dictionary containing the generated message.
     """
     try:
-        return {"messages": [llm_with_tools.invoke([sys_msg] + state["messages"][-6:])]}
+        return {"messages": [await llm_with_tools.ainvoke([sys_msg, *trim_history(state["messages"])])]}
     except Exception as e:
         logger.error(f"Error during response generation: {e}")
         raise
 
-def custom_tool_node(state: MessagesState):
+async def custom_tool_node(state: MessagesState):
     """
     Custom tool node that can access the agent's state and handle tools accordingly.
+
+    Independent tool calls (e.g. resolving several cases) run concurrently.
     """
-    results: list[ToolMessage] = []
-    
     # Get the last AI message which may contain tool calls
     ai_msg = state["messages"][-1]
+    tool_calls = getattr(ai_msg, "tool_calls", None) or []
     
-    if not hasattr(ai_msg, "tool_calls"):
-        return {"messages": results}
+    if not tool_calls:
+        return {"messages": []}
     
-    for call in ai_msg.tool_calls:
-        tool_name = call["name"]
-        args = call["args"]
-        tool_call_id = call["id"]
-        
-        if tool_name == "mark_case_resolved":
-            # Handle mark_case_resolved tool
-            emergency_id = args.get("emergency_id")
-            emergency_type = args.get("emergency_type")
-            
-            if not emergency_id or not emergency_type:
-                results.append(ToolMessage(
-                    content="Error: Missing emergency_id or emergency_type parameters",
-                    tool_call_id=tool_call_id
-                ))
-                continue
-            
-            result = resolve_emergency_case(emergency_id, emergency_type)
-            results.append(ToolMessage(
-                content=f"Case resolution result: {result['message']}",
-                tool_call_id=tool_call_id
-            ))
-        else:
-            # Handle other tools normally
-            tool_fn = tools_by_name.get(tool_name)
-            if tool_fn is not None:
-                observation = tool_fn.invoke(args)
-                results.append(ToolMessage(content=str(observation), tool_call_id=tool_call_id))
+    async def run_call(call) -> ToolMessage:
+        tool_fn = tools_by_name.get(call["name"])
+        if tool_fn is None:
+            # Every tool call needs a response, or the next model call is rejected
+            return ToolMessage(content=f"Unknown tool: {call['name']}", tool_call_id=call["id"], status="error")
+        # Sync tools such as the status update run in a worker thread
+        observation = await tool_fn.ainvoke(call["args"])
+        return ToolMessage(content=str(observation), tool_call_id=call["id"])
     
+    # gather keeps results in tool call order; a failing call must not cancel the others
+    outcomes = await asyncio.gather(*(run_call(call) for call in tool_calls), return_exceptions=True)
+    results: list[ToolMessage] = []
+    for call, outcome in zip(tool_calls, outcomes):
+        if isinstance(outcome, Exception):
+            logger.error(f"Error running tool {call['name']}: {outcome}")
+            outcome = ToolMessage(content=f"Error: {outcome}", tool_call_id=call["id"], status="error")
+        results.append(outcome)
     return {"messages": results}
 
 # Build graph
@@ -218,7 +206,7 @@ try:
     graph_builder.add_conditional_edges("generate", tools_condition)
     graph_builder.add_edge("tools", "generate")
 
-    memory = MongoDBSaver(mongodb_client)
+    memory = BatchingMongoDBSaver(mongodb_client)
     followup_graph = graph_builder.compile(checkpointer=memory)
 except Exception as e:
     logger.error(f"Error building state graph: {e}")
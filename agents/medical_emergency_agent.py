@@ -1,56 +1,38 @@
 import logging
-from langchain_community.document_loaders import TextLoader
 from dotenv import load_dotenv
 from langchain.tools.retriever import create_retriever_tool
-from langchain_openai import ChatOpenAI
-from langchain_openai import OpenAIEmbeddings
-from langchain_core.vectorstores import InMemoryVectorStore
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langgraph.graph import MessagesState, StateGraph, START, END
+from langgraph.graph import StateGraph, START, END
 from langgraph.prebuilt import tools_condition
-from langgraph.checkpoint.mongodb import MongoDBSaver
 from langchain_core.tools import tool
-from langchain_core.messages import ToolMessage
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.messages import SystemMessage
 from typing import Annotated
 from configurations.config import config
 from configurations.db import mongodb_client
-from utils.message_formatter import format_conversation_messages
 from utils.database_utils import save_medical_emergency
 from agents.schemas.agent_schemas import MedicalEmergencySchema
-
-# Configure logging
-logging.basicConfig(
-    level=logging.ERROR,  # Only log errors and above
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler("medical_emergency.log"),
-        logging.StreamHandler()
-    ]
-)
+from agents._retriever_cache import get_retriever
+from agents._llm import get_llm, get_llm_with_tools, summarize_history, trim_history
+from agents._checkpointer import BatchingMongoDBSaver
+from agents._case_state import CaseState, CaseTools
+from agents.prompts.base import build_emergency_prompt
+from agents.prompts.extraction import MEDICAL_EXTRACTION_INSTRUCTIONS
+
+# Logging is configured once at application entry (configurations/logging_config.py)
 logger = logging.getLogger(__name__)
 
 # Load environment variables
 load_dotenv()
 
-# Initialize embeddings, vector store, and retriever
+# Initialize retriever (shared across agents, indexed on first use)
 try:
-    embeddings = OpenAIEmbeddings(model="text-embedding-3-large")
-    vector_store = InMemoryVectorStore(embeddings)
-
-    loader = TextLoader(f"data/{config.SOURCE_FILENAME_MEDICAL}", encoding="utf-8")
-    docs = loader.load()
-
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=150)
-    all_splits = text_splitter.split_documents(docs)
-
-    _ = vector_store.add_documents(documents=all_splits)
-    retriever = vector_store.as_retriever(search_type="similarity", search_kwargs={"k": 3})
+    retriever = get_retriever(config.SOURCE_FILENAME_MEDICAL, semantic_cache=True)
 except Exception as e:
     logger.error(f"Error during initialization: {e}")
     raise
 
-# Initialize LLM
-llm = ChatOpenAI(model="gpt-4o-mini")
+# Initialize LLM (shared client)
+llm = get_llm()
 
 medical_emergency_info_retriever = create_retriever_tool(
     retriever,
@@ -58,70 +40,32 @@ medical_emergency_info_retriever = create_retriever_tool(
     "Searches information about medical emergencies, first aid procedures, emergency protocols, and medical guidance. Takes in a query and finds relevant medical context to answer emergency situations.",
 )
 
-def submit_medical_case(state: MessagesState):
-    """
-    Submit medical emergency case to database
-    
-    Args:
-        state: Current agent state with conversation history
-        
-    Returns:
-        dict: Submission result
-    """
-    # Extract information from conversation history
-    messages = state.get("messages", [])
-    
-    # Format conversation for processing
-    formatted_conversation = format_conversation_messages(state)
-    print("-------------")
-    print("formatted_conversation", formatted_conversation)
-    print("-------------")
-    
-    try:
-        # Use LLM with structured output to extract data from conversation
-        structured_llm = llm.with_structured_output(MedicalEmergencySchema)
-        
-        # Create prompt for data extraction
-        extraction_prompt = f"""
-        Extract medical emergency information from the following conversation and structure it according to the MedicalEmergencySchema.
-        
-        Conversation:
-        {formatted_conversation}
-        
-        Please extract the following information:
-        - Patient name, age, phone number
-        - Location address
-        - Emergency type (heart attack, accident, etc.)
-        - Symptoms description
-        - Urgency level (severe, moderate, minor)
-        - Allergies and medications
-        - Contact person information
-        
-        If any information is not available in the conversation, leave it as null.
-        """
-        
-        # Extract structured data using LLM
-        medical_data = structured_llm.invoke(extraction_prompt)
-        
-        # Save to database
-        user_id = "default_user"  # In real implementation, this would come from authentication
-        case_id = save_medical_emergency(user_id, medical_data)
-        
-        print(f"Medical emergency case saved to database with ID: {case_id}")
-        
-        return {
-            "status": "submitted",
-            "case_id": case_id,
-            "message": "Medical emergency case has been submitted successfully. Emergency services have been notified."
-        }
-        
-    except Exception as e:
-        logger.error(f"Error submitting medical emergency case: {e}")
-        return {
-            "status": "error",
-            "case_id": None,
-            "message": f"Failed to submit medical emergency case: {str(e)}"
-        }
+# Fields that must be recorded before a case can be submitted without LLM extraction
+REQUIRED_FIELDS = (
+    "patient_name", "patient_phone", "location_address", "emergency_type", "symptoms", "urgency_level",
+)
+
+# Structured extraction is bound and the prompt parsed once, not per submission
+structured_llm = llm.with_structured_output(MedicalEmergencySchema)
+# Static instructions first so repeated extractions share a cacheable prompt prefix
+extraction_prompt = ChatPromptTemplate.from_messages([
+    ("system", MEDICAL_EXTRACTION_INSTRUCTIONS),
+    MessagesPlaceholder("conversation"),
+])
+extraction_chain = extraction_prompt | structured_llm
+
+
+class MedicalState(CaseState):
+    """Case state plus the rolling summary of folded-in older turns."""
+
+    summary: str
+
+
+def summary_messages(state: MedicalState) -> list[SystemMessage]:
+    """Return the rolling summary as a system message, if there is one."""
+    summary = state.get("summary")
+    return [SystemMessage(content=f"Summary of the earlier conversation:\n{summary}")] if summary else []
+
 
 @tool
 def submit_case():
@@ -144,61 +88,42 @@ def submit_case():
     # This tool will be handled by the custom tool node
     return {"status": "Submitted"}
 
+# Tool node and submission shared with the other emergency agents
+case_tools = CaseTools(
+    schema=MedicalEmergencySchema,
+    case_kind="medical emergency",
+    required_fields=REQUIRED_FIELDS,
+    extraction_chain=extraction_chain,
+    save=save_medical_emergency,
+    notified="Emergency services have been notified.",
+    retriever_tool=medical_emergency_info_retriever,
+    context=summary_messages,
+)
+
 # Define tools
-tools = [medical_emergency_info_retriever, submit_case]
-tools_by_name = {t.name: t for t in tools}
+tools = [medical_emergency_info_retriever, case_tools.record_tool, submit_case]
 
 try:
-    llm_with_tools = llm.bind_tools(tools)
+    llm_with_tools = get_llm_with_tools(tools)
 except Exception as e:
     logger.error(f"Error binding tools: {e}")
     raise
 
-sys_msg = """
-You are a Medical Emergency Response Assistant specialized in providing immediate medical guidance and emergency protocols. Your role is to help users during medical emergencies by providing clear, accurate, and actionable medical information to ensure the best possible outcome in critical situations.
-
-#Tone:
-- Calm and reassuring
-- Professional and authoritative
-- Urgent when necessary
-- Supportive and empathetic
-
-#Important Guidelines:
-- If the user greets you, respond warmly and introduce yourself as a Medical Emergency Assistant.
-- CRITICAL: You are a MULTI-LINGUAL assistant. You MUST respond in the EXACT SAME LANGUAGE that the user is using.
-- Detect the user's language automatically and respond accordingly (English, Spanish, French, German, Italian, Portuguese, Arabic, Chinese, Japanese, Korean, Hindi, etc.).
-- Always provide accurate and context-based medical information in the user's language.
-- If the user's question is not related to medical emergencies or health, respond politely in their language:
-'[Translated to user's language] I am specialized in medical emergency assistance. For non-medical questions, please contact appropriate services. How can I help with your medical emergency?'
-- If the user's question is unclear or lacks critical details, ask for more specific information about the medical situation in their language.
-- Focus on collecting all required information to connect them with professional medical help.
-- Always reassure the user that you are working to connect them with professional medical assistance.
-- Your responses should emphasize that you are gathering information to ensure they get the right professional help.
-- Give precise and concise medical guidance while collecting information. Avoid unnecessary information that could delay response.
-- Always use appropriate emojis for medical emergency contexts:
-General Medical
-🏥 🩺 💊 ⚕️ 🚑 🚨
-Emergency Response
-🚨 ⚠️ 🆘 🏃‍♂️ 📞 🔥
-Symptoms and Conditions
-🤒 🤕 🤢 😰 😵 💔
-Medical Tools and Equipment
-🩹 💉 🩸 🧬 🫀 🫁
-Support and Care
-🤗 🙏 💪 🌟 🛡️ 💖
-Time and Urgency
-⏰ ⚡ 🚀 🎯 📍 🗺️
-
-#Critical Emergency Protocols:
-- Focus on gathering all required information quickly and efficiently
-- Provide immediate first aid guidance while collecting information
-- Always reassure users that professional medical help is being arranged
-- Emphasize that you are working to connect them with the right medical professionals
-- Remind users that you are coordinating their case with emergency medical services
-
-#Required Information Collection:
-You MUST collect the following information from users to prepare comprehensive reports for paramedics and nurses:
-
+# Static prompt kept byte-identical across calls so OpenAI can reuse its cached prefix
+sys_msg = build_emergency_prompt(
+    record_details=True,
+    intro="You are a Medical Emergency Response Assistant specialized in providing immediate medical guidance and emergency protocols. Your role is to help users during medical emergencies by providing clear, accurate, and actionable medical information to ensure the best possible outcome in critical situations.",
+    tone_focus="Supportive and empathetic",
+    assistant_name="a Medical Emergency Assistant",
+    topic="medical",
+    scope="medical emergencies or health",
+    decline="I am specialized in medical emergency assistance. For non-medical questions, please contact appropriate services. How can I help with your medical emergency?",
+    situation="medical",
+    service="medical",
+    emojis="🏥 🩺 🚑 🚨 ⚠️ 🆘 📞 🩹 💊 🤗 🙏 ⏰ 📍",
+    protocols_title="Critical Emergency Protocols",
+    report_audience="paramedics and nurses",
+    required_information="""\
 **Patient Details:**
 - Name, age, gender, ID (optional), phone number
 
@@ -218,102 +143,64 @@ You MUST collect the following information from users to prepare comprehensive r
 - Severe (life-threatening), Moderate, Minor
 
 **Contact Person:**
-- Relative/friend phone number (if patient unconscious)
-
-**Collection Strategy:**
-- Ask for information systematically and clearly
-- Prioritize critical information first (location, emergency type, urgency)
-- Use follow-up questions to gather complete details
-- Confirm all collected information before proceeding
-
-#Must Do:
-- CRITICAL: You are MULTI-LINGUAL. You MUST respond in the EXACT SAME LANGUAGE that the user is using.
-- Detect the user's language automatically and respond accordingly (English, Spanish, French, German, Italian, Portuguese, Arabic, Chinese, Japanese, Korean, Hindi, etc.).
-- If the tool cannot retrieve relevant information on the first attempt, call it again with a different medical query.
-- ALWAYS collect the required information fields listed above before providing final guidance.
- 
-Tool Usage:
-- Use the Medical Emergency Info Retriever tool to search for medical emergency information, first aid procedures, and emergency protocols.
-- Always use this tool to retrieve medical information to answer emergency queries.
-- If the tool cannot retrieve relevant information on the first attempt, call it again with a different medical query.
-- This tool requires the argument `query`. Make sure to pass detailed medical queries to it. If a user gives a short query, convert it into a detailed medical query.
-For example: if the user asks "heart attack", convert it into "What are the symptoms of heart attack and immediate first aid procedures?"
-- If the user's question is in a non-English language, translate it to English for the tool query, then provide the response in the user's original language.
-- Use the retrieved information to answer medical queries accurately and concisely.
-- Don't provide medical advice beyond your training data.
-- Don't explain your internal workings or tools.
-- If the tool provides extra information, only use the specific information relevant to the medical emergency.
-- For follow-up medical questions, ensure tool calls consider the context of prior medical interactions.
-
-Case Submission:
-- Use the `submit_case` tool ONLY when you have collected ALL required information fields listed above.
-- This tool will submit the complete medical emergency case and connect them with professional medical help.
-- Do NOT call this tool until all patient details, location, emergency type, symptoms, medical history, urgency level, and contact information have been gathered.
-- After calling this tool, confirm to the user that their case has been submitted and that professional medical assistance is being coordinated for them.
-
-Response Language:
-CRITICAL: You are MULTI-LINGUAL. You MUST respond in the EXACT SAME LANGUAGE that the user is using. Detect the user's language automatically and respond accordingly (English, Spanish, French, German, Italian, Portuguese, Arabic, Chinese, Japanese, Korean, Hindi, etc.).
-"""
-
-def generate(state: MessagesState):
+- Relative/friend phone number (if patient unconscious)""",
+    priority="location, emergency type, urgency",
+    retriever_title="Medical Emergency Info Retriever",
+    retriever_topics="medical emergency information, first aid procedures, and emergency protocols",
+    query_kind="medical",
+    query_instructions=(
+        "Make sure to pass detailed medical queries to it. If a user gives a short query, convert it into a detailed medical query.\n"
+        'For example: if the user asks "heart attack", convert it into "What are the symptoms of heart attack and immediate first aid procedures?"'
+    ),
+    case_kind="medical emergency",
+    submit_requirements="all patient details, location, emergency type, symptoms, medical history, urgency level, and contact information",
+)
+
+# Parse the system prompt into a message once instead of on every call
+SYS_MSG = SystemMessage(content=sys_msg)
+
+async def summarize(state: MedicalState):
+    """
+    Folds older turns into the rolling summary once the history grows long.
+
+    Parameters:
+        state (MedicalState): The state of the conversation.
+
+    Returns:
+        dict: The updated summary and the folded messages to remove, or nothing.
+    """
+    return await summarize_history(state["messages"], state.get("summary", ""), focus="medical triage continuity")
+
+async def generate(state: MedicalState):
     """
     Generates a response based on the user's message history.
 
     Parameters:
-        state (MessagesState): The state of the conversation, containing past messages.
+        state (MedicalState): The state of the conversation, containing past messages.
 
     Returns:
         dict: A dictionary containing the generated message.
     """
     try:
-        return {"messages": [llm_with_tools.invoke([sys_msg] + state["messages"][-6:])]}
+        # The static prompt stays first so its cached prefix is still reused
+        messages = [SYS_MSG, *summary_messages(state), *trim_history(state["messages"])]
+        return {"messages": [await llm_with_tools.ainvoke(messages)]}
     except Exception as e:
         logger.error(f"Error during response generation: {e}")
         raise
 
-def custom_tool_node(state: MessagesState):
-    """
-    Custom tool node that can access the agent's state and handle tools accordingly.
-    """
-    results: list[ToolMessage] = []
-    
-    # Get the last AI message which may contain tool calls
-    ai_msg = state["messages"][-1]
-    
-    if not hasattr(ai_msg, "tool_calls"):
-        return {"messages": results}
-    
-    for call in ai_msg.tool_calls:
-        tool_name = call["name"]
-        args = call["args"]
-        tool_call_id = call["id"]
-        
-        if tool_name == "submit_case":
-            # Handle submit_case with access to full state
-            result = submit_medical_case(state)
-            results.append(ToolMessage(
-                content=f"Case submitted successfully. Case ID: {result['case_id']}. {result['message']}", 
-                tool_call_id=tool_call_id
-            ))
-        else:
-            # Handle other tools normally
-            tool_fn = tools_by_name.get(tool_name)
-            if tool_fn is not None:
-                observation = tool_fn.invoke(args)
-                results.append(ToolMessage(content=str(observation), tool_call_id=tool_call_id))
-    
-    return {"messages": results}
-
 # Build graph
 try:
-    graph_builder = StateGraph(MessagesState)
+    graph_builder = StateGraph(MedicalState)
+    graph_builder.add_node("summarize", summarize)
     graph_builder.add_node("generate", generate)
-    graph_builder.add_node("tools", custom_tool_node)
-    graph_builder.add_edge(START, "generate")
+    graph_builder.add_node("tools", case_tools.tool_node)
+    graph_builder.add_edge(START, "summarize")
+    graph_builder.add_edge("summarize", "generate")
     graph_builder.add_conditional_edges("generate", tools_condition)
     graph_builder.add_edge("tools", "generate")
 
-    memory = MongoDBSaver(mongodb_client)
+    memory = BatchingMongoDBSaver(mongodb_client)
     medical_emergency_graph = graph_builder.compile(checkpointer=memory)
 except Exception as e:
     logger.error(f"Error building state graph: {e}")
@@ -1,56 +1,38 @@
 
 import logging
-from langchain_community.document_loaders import TextLoader
 from dotenv import load_dotenv
 from langchain.tools.retriever import create_retriever_tool
-from langchain_openai import ChatOpenAI
-from langchain_openai import OpenAIEmbeddings
-from langchain_core.vectorstores import InMemoryVectorStore
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langgraph.graph import MessagesState, StateGraph, START, END
+from langgraph.graph import StateGraph, START, END
 from langgraph.prebuilt import tools_condition
-from langgraph.checkpoint.mongodb import MongoDBSaver
 from langchain_core.tools import tool
-from langchain_core.messages import ToolMessage
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.messages import SystemMessage
 from configurations.config import config
 from configurations.db import mongodb_client
-from utils.message_formatter import format_conversation_messages
 from utils.database_utils import save_police_emergency
 from agents.schemas.agent_schemas import PoliceEmergencySchema
-
-# Configure logging
-logging.basicConfig(
-    level=logging.ERROR,  # Only log errors and above
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler("police_emergency.log"),
-        logging.StreamHandler()
-    ]
-)
+from agents._retriever_cache import get_retriever
+from agents._llm import get_llm, get_llm_with_tools, trim_history
+from agents._checkpointer import BatchingMongoDBSaver
+from agents._case_state import CaseState, CaseTools
+from agents.prompts.base import RECORD_INSTRUCTION
+from agents.prompts.extraction import POLICE_EXTRACTION_INSTRUCTIONS
+
+# Logging is configured once at application entry (configurations/logging_config.py)
 logger = logging.getLogger(__name__)
 
 # Load environment variables
 load_dotenv()
 
-# Initialize embeddings, vector store, and retriever
+# Initialize retriever (shared across agents, indexed on first use)
 try:
-    embeddings = OpenAIEmbeddings(model="text-embedding-3-large")
-    vector_store = InMemoryVectorStore(embeddings)
-
-    loader = TextLoader(f"data/{config.SOURCE_FILENAME_POLICE}", encoding="utf-8")
-    docs = loader.load()
-
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=150)
-    all_splits = text_splitter.split_documents(docs)
-
-    _ = vector_store.add_documents(documents=all_splits)
-    retriever = vector_store.as_retriever(search_type="similarity", search_kwargs={"k": 3})
+    retriever = get_retriever(config.SOURCE_FILENAME_POLICE, semantic_cache=True)
 except Exception as e:
     logger.error(f"Error during initialization: {e}")
     raise
 
-# Initialize LLM
-llm = ChatOpenAI(model="gpt-4o-mini")
+# Initialize LLM (shared client)
+llm = get_llm()
 
 police_emergency_info_retriever = create_retriever_tool(
     retriever,
@@ -58,70 +40,19 @@ police_emergency_info_retriever = create_retriever_tool(
     "Searches information about police emergencies, law enforcement procedures, emergency protocols, and police guidance. Takes in a query and finds relevant law enforcement context to answer emergency situations.",
 )
 
-def submit_police_case(state: MessagesState):
-    """
-    Submit police emergency case to database
-    
-    Args:
-        state: Current agent state with conversation history
-        
-    Returns:
-        dict: Submission result
-    """
-    # Extract information from conversation history
-    messages = state.get("messages", [])
-    
-    # Format conversation for processing
-    formatted_conversation = format_conversation_messages(state)
-    print("-------------")
-    print("formatted_conversation", formatted_conversation)
-    print("-------------")
-    
-    try:
-        # Use LLM with structured output to extract data from conversation
-        structured_llm = llm.with_structured_output(PoliceEmergencySchema)
-        
-        # Create prompt for data extraction
-        extraction_prompt = f"""
-        Extract police emergency information from the following conversation and structure it according to the PoliceEmergencySchema.
-        
-        Conversation:
-        {formatted_conversation}
-        
-        Please extract the following information:
-        - Reporter name, phone number
-        - Incident location address
-        - Type of incident (theft, assault, domestic violence, harassment, etc.)
-        - Time of incident
-        - Description of the incident
-        - Suspect details (appearance, vehicle, etc.)
-        - Urgency level
-        
-        If any information is not available in the conversation, leave it as null.
-        """
-        
-        # Extract structured data using LLM
-        police_data = structured_llm.invoke(extraction_prompt)
-        
-        # Save to database
-        user_id = "default_user"  # In real implementation, this would come from authentication
-        case_id = save_police_emergency(user_id, police_data)
-        
-        print(f"Police emergency case saved to database with ID: {case_id}")
-        
-        return {
-            "status": "submitted",
-            "case_id": case_id,
-            "message": "Police emergency case has been submitted successfully. Law enforcement has been notified."
-        }
-        
-    except Exception as e:
-        logger.error(f"Error submitting police emergency case: {e}")
-        return {
-            "status": "error",
-            "case_id": None,
-            "message": f"Failed to submit police emergency case: {str(e)}"
-        }
+# Fields that must be recorded before a case can be submitted without LLM extraction
+REQUIRED_FIELDS = (
+    "reporter_name", "reporter_phone", "incident_location", "incident_type", "incident_time", "description", "urgency",
+)
+
+# Structured extraction is bound and the prompt parsed once, not per submission
+structured_llm = llm.with_structured_output(PoliceEmergencySchema)
+# Static instructions first so repeated extractions share a cacheable prompt prefix
+extraction_prompt = ChatPromptTemplate.from_messages([
+    ("system", POLICE_EXTRACTION_INSTRUCTIONS),
+    MessagesPlaceholder("conversation"),
+])
+extraction_chain = extraction_prompt | structured_llm
 
 @tool
 def submit_case():
@@ -145,12 +76,22 @@ def submit_case():
     # This tool will be handled by the custom tool node
     return {"status": "Submitted"}
 
+# Tool node and submission shared with the other emergency agents
+case_tools = CaseTools(
+    schema=PoliceEmergencySchema,
+    case_kind="police emergency",
+    required_fields=REQUIRED_FIELDS,
+    extraction_chain=extraction_chain,
+    save=save_police_emergency,
+    notified="Law enforcement has been notified.",
+    retriever_tool=police_emergency_info_retriever,
+)
+
 # Define tools
-tools = [police_emergency_info_retriever, submit_case]
-tools_by_name = {t.name: t for t in tools}
+tools = [police_emergency_info_retriever, case_tools.record_tool, submit_case]
 
 try:
-    llm_with_tools = llm.bind_tools(tools)
+    llm_with_tools = get_llm_with_tools(tools)
 except Exception as e:
     logger.error(f"Error binding tools: {e}")
     raise
@@ -250,7 +191,7 @@ For example: if the user asks "burglary", convert it into "What should I do duri
 - For follow-up law enforcement questions, ensure tool calls consider the context of prior law enforcement interactions.
 
 Case Submission:
-- Use the `submit_case` tool ONLY when you have collected ALL required information fields listed above.
+""" + RECORD_INSTRUCTION + """- Use the `submit_case` tool ONLY when you have collected ALL required information fields listed above.
 - This tool will submit the complete police emergency case and connect them with professional law enforcement help.
 - Do NOT call this tool until all reporter details, incident location, incident type, time, description, suspect details, victim details, and urgency level have been gathered.
 - After calling this tool, confirm to the user that their case has been submitted and that professional law enforcement assistance is being coordinated for them.
@@ -259,65 +200,35 @@ Response Language:
 CRITICAL: You are MULTI-LINGUAL. You MUST respond in the EXACT SAME LANGUAGE that the user is using. Detect the user's language automatically and respond accordingly (English, Spanish, French, German, Italian, Portuguese, Arabic, Chinese, Japanese, Korean, Hindi, etc.).
 """
 
-def generate(state: MessagesState):
+# Parse the system prompt into a message once instead of on every call
+SYS_MSG = SystemMessage(content=sys_msg)
+
+async def generate(state: CaseState):
     """
     Generates a response based on the user's message history.
 
     Parameters:
-        state (MessagesState): The state of the conversation, containing past messages.
+        state (CaseState): The state of the conversation, containing past messages.
 
     Returns:
         dict: A dictionary containing the generated message.
     """
     try:
-        return {"messages": [llm_with_tools.invoke([sys_msg] + state["messages"][-6:])]}
+        return {"messages": [await llm_with_tools.ainvoke([SYS_MSG, *trim_history(state["messages"])])]}
     except Exception as e:
         logger.error(f"Error during response generation: {e}")
         raise
 
-def custom_tool_node(state: MessagesState):
-    """
-    Custom tool node that can access the agent's state and handle tools accordingly.
-    """
-    results: list[ToolMessage] = []
-    
-    # Get the last AI message which may contain tool calls
-    ai_msg = state["messages"][-1]
-    
-    if not hasattr(ai_msg, "tool_calls"):
-        return {"messages": results}
-    
-    for call in ai_msg.tool_calls:
-        tool_name = call["name"]
-        args = call["args"]
-        tool_call_id = call["id"]
-        
-        if tool_name == "submit_case":
-            # Handle submit_case with access to full state
-            result = submit_police_case(state)
-            results.append(ToolMessage(
-                content=f"Case submitted successfully. Case ID: {result['case_id']}. {result['message']}", 
-                tool_call_id=tool_call_id
-            ))
-        else:
-            # Handle other tools normally
-            tool_fn = tools_by_name.get(tool_name)
-            if tool_fn is not None:
-                observation = tool_fn.invoke(args)
-                results.append(ToolMessage(content=str(observation), tool_call_id=tool_call_id))
-    
-    return {"messages": results}
-
 # Build graph
 try:
-    graph_builder = StateGraph(MessagesState)
+    graph_builder = StateGraph(CaseState)
     graph_builder.add_node("generate", generate)
-    graph_builder.add_node("tools", custom_tool_node)
+    graph_builder.add_node("tools", case_tools.tool_node)
     graph_builder.add_edge(START, "generate")
     graph_builder.add_conditional_edges("generate", tools_condition)
     graph_builder.add_edge("tools", "generate")
 
-    memory = MongoDBSaver(mongodb_client)
+    memory = BatchingMongoDBSaver(mongodb_client)
     police_emergency_graph = graph_builder.compile(checkpointer=memory)
 except Exception as e:
     logger.error(f"Error building state graph: {e}")
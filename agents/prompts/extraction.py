@@ -0,0 +1,66 @@
+"""
+Instructions for extracting a structured case from an emergency conversation.
+
+Shared by the agents' ``submit_case`` fallback and the offline batch
+extraction in ``utils/batch_extract.py``.
+"""
+
+ELECTRICITY_EXTRACTION_INSTRUCTIONS = """
+Extract electricity emergency information from the conversation that follows and structure it according to the ElectricityEmergencySchema.
+
+Please extract the following information:
+- Reporter name, phone number
+- Location address
+- Type of issue (power outage, transformer issue, broken electric pole, etc.)
+- Severity level (hazardous, major outage, minor)
+- Time issue started
+- Description of the problem
+
+If any information is not available in the conversation, leave it as null.
+"""
+
+FIRE_EXTRACTION_INSTRUCTIONS = """
+Extract fire emergency information from the conversation that follows and structure it according to the FireEmergencySchema.
+
+Please extract the following information:
+- Reporter name, phone number
+- Location address
+- Fire type (building fire, vehicle fire, etc.)
+- Severity level (critical, major, minor)
+- Time fire started
+- People at risk
+- Building/structure details
+- Hazards present
+
+If any information is not available in the conversation, leave it as null.
+"""
+
+MEDICAL_EXTRACTION_INSTRUCTIONS = """
+Extract medical emergency information from the conversation that follows and structure it according to the MedicalEmergencySchema.
+
+Please extract the following information:
+- Patient name, age, phone number
+- Location address
+- Emergency type (heart attack, accident, etc.)
+- Symptoms description
+- Urgency level (severe, moderate, minor)
+- Allergies and medications
+- Contact person information
+
+If any information is not available in the conversation, leave it as null.
+"""
+
+POLICE_EXTRACTION_INSTRUCTIONS = """
+Extract police emergency information from the conversation that follows and structure it according to the PoliceEmergencySchema.
+
+Please extract the following information:
+- Reporter name, phone number
+- Incident location address
+- Type of incident (theft, assault, domestic violence, harassment, etc.)
+- Time of incident
+- Description of the incident
+- Suspect details (appearance, vehicle, etc.)
+- Urgency level
+
+If any information is not available in the conversation, leave it as null.
+"""
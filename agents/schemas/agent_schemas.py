@@ -1,8 +1,19 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional
 
+
+class CaseSchema(BaseModel):
+    """Base for the extracted case schemas.
+
+    Instances are built once per case and only read afterwards, so they are
+    frozen; unknown keys from model output are dropped rather than stored.
+    """
+
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
+
 # Medical Emergency Schema
-class MedicalEmergencySchema(BaseModel):
+class MedicalEmergencySchema(CaseSchema):
     patient_name: Optional[str] = Field(None, description="Patient's name")
     patient_age: Optional[int] = Field(None, description="Patient's age")
     patient_phone: Optional[str] = Field(None, description="Patient's phone number")
@@ -15,7 +26,7 @@ class MedicalEmergencySchema(BaseModel):
     contact_person: Optional[str] = Field(None, description="Emergency contact")
 
 # Police Emergency Schema
-class PoliceEmergencySchema(BaseModel):
+class PoliceEmergencySchema(CaseSchema):
     reporter_name: Optional[str] = Field(None, description="Reporter's name")
     reporter_phone: Optional[str] = Field(None, description="Reporter's phone")
     incident_location: Optional[str] = Field(None, description="Incident address")
@@ -26,7 +37,7 @@ class PoliceEmergencySchema(BaseModel):
     urgency: Optional[str] = Field(None, description="Urgency level")
 
 # Electricity Emergency Schema
-class ElectricityEmergencySchema(BaseModel):
+class ElectricityEmergencySchema(CaseSchema):
     reporter_name: Optional[str] = Field(None, description="Reporter's name")
     reporter_phone: Optional[str] = Field(None, description="Reporter's phone")
     location: Optional[str] = Field(None, description="Issue location")
@@ -36,7 +47,7 @@ class ElectricityEmergencySchema(BaseModel):
     description: Optional[str] = Field(None, description="Issue description")
 
 # Fire Emergency Schema
-class FireEmergencySchema(BaseModel):
+class FireEmergencySchema(CaseSchema):
     reporter_name: Optional[str] = Field(None, description="Reporter's name")
     reporter_phone: Optional[str] = Field(None, description="Reporter's phone")
     location: Optional[str] = Field(None, description="Fire location")
@@ -54,6 +65,6 @@ ElectricityEmergencyInfo = ElectricityEmergencySchema
 FireEmergencyInfo = FireEmergencySchema
 
 # Triage Schema
-class TriageSchema(BaseModel):
+class TriageSchema(CaseSchema):
     emergency_type: Optional[str] = Field(None, description="Medical, Police, Electricity, or Fire")
     user_query: Optional[str] = Field(None, description="User's query")
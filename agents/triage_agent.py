@@ -8,17 +8,9 @@ from langgraph.checkpoint.mongodb import MongoDBSaver
 from langchain_core.tools import tool
 from langchain_core.messages import ToolMessage
 from configurations.db import mongodb_client
-from langchain_openai import ChatOpenAI
-
-# Configure logging
-logging.basicConfig(
-    level=logging.ERROR,  # Only log errors and above
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler("zaingpt.log"),
-        logging.StreamHandler()
-    ]
-)
+from agents._llm import get_llm, get_llm_with_tools
+
+# Logging is configured once at application entry (configurations/logging_config.py)
 logger = logging.getLogger(__name__)
 
 # Load environment variables
@@ -46,7 +38,7 @@ class EmergencyType(Enum):
     Fire = "Fire"
 
 
-llm = ChatOpenAI(model="gpt-4o-mini")
+llm = get_llm()
 
 @tool
 def classify_emergency_type(emergency_type: EmergencyType):
@@ -65,7 +57,7 @@ tools = [classify_emergency_type]
 tools_by_name = {t.name: t for t in tools}
 
 try:
-    llm_with_tools = llm.bind_tools(tools)
+    llm_with_tools = get_llm_with_tools(tools)
 except Exception as e:
     logger.error(f"Error binding tools: {e}")
     raise
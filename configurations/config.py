@@ -11,6 +11,8 @@ class Config(BaseSettings):
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY","")
     POSTGRESQL_URL: str = os.getenv("POSTGRESQL_URL","")
     MONGODB_URI: str = os.getenv("MONGODB_URI","")
+    MONGODB_MAX_POOL_SIZE: int = int(os.getenv("MONGODB_MAX_POOL_SIZE","50"))
+    MONGODB_MIN_POOL_SIZE: int = int(os.getenv("MONGODB_MIN_POOL_SIZE","5"))
     HOST: str = os.getenv("HOST","")
     PORT: str = os.getenv("PORT","")
     JWT_SECRET_KEY: str = os.getenv("JWT_SECRET_KEY","")
@@ -19,6 +21,13 @@ class Config(BaseSettings):
     SOURCE_FILENAME_POLICE: str = os.getenv("SOURCE_FILENAME_POLICE","police_data.txt")
     SOURCE_FILENAME_ELECTRICITY: str = os.getenv("SOURCE_FILENAME_ELECTRICITY","electricity_data.txt")
     SOURCE_FILENAME_FIRE: str = os.getenv("SOURCE_FILENAME_FIRE","fire_data.txt")
+    CACHE_DIR: str = os.getenv("CACHE_DIR",".cache")
+    RERANKER_MODEL: str = os.getenv("RERANKER_MODEL","")
+    EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL","text-embedding-3-small")
+    EMBEDDING_DIMENSIONS: int = int(os.getenv("EMBEDDING_DIMENSIONS","512"))
+    EMBEDDING_BACKEND: str = os.getenv("EMBEDDING_BACKEND","openai")
+    INFINITY_API_URL: str = os.getenv("INFINITY_API_URL","http://localhost:7997")
+    PRELOAD_RETRIEVERS: bool = os.getenv("PRELOAD_RETRIEVERS","false").lower() == "true"
     
     # SMTP Configuration
     SMTP_HOST: str = os.getenv("SMTP_HOST","smtp.gmail.com")
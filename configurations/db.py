@@ -3,7 +3,13 @@ from pymongo import MongoClient
 
 
 try:
-    mongodb_client = MongoClient(config.MONGODB_URI)
+    # Keep a few connections open so checkpoint flushes after idle periods skip the handshake
+    mongodb_client = MongoClient(
+        config.MONGODB_URI,
+        maxPoolSize=config.MONGODB_MAX_POOL_SIZE,
+        minPoolSize=config.MONGODB_MIN_POOL_SIZE,
+        retryWrites=True,
+    )
     chat_db = mongodb_client["chat_database"]
     chat_collection = chat_db["chat_history"]
     deleted_chat_collection = chat_db["deleted_chat_history"]
@@ -0,0 +1,76 @@
+"""
+Application logging setup.
+
+Log records are handed to a background thread through a queue, so request
+handlers never block on disk writes. Each agent's records go to its own log
+file (rotated by size), and every record is also echoed to the console.
+"""
+
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Each log file is rotated at this size, keeping this many old files
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 3
+
+# Logger name -> log file that receives its records
+AGENT_LOG_FILES = {
+    "agents.electricity_emergency_agent": "electricity_emergency.log",
+    "agents.fire_emergency_agent": "fire_emergency.log",
+    "agents.followup_agent": "followup_agent.log",
+    "agents.medical_emergency_agent": "medical_emergency.log",
+    "agents.police_emergency_agent": "police_emergency.log",
+    "agents.triage_agent": "zaingpt.log",
+}
+
+_listener: QueueListener | None = None
+
+
+def setup_logging(level: int = logging.ERROR) -> None:
+    """
+    Route all logging through a queue to the console and per-agent log files.
+
+    Safe to call more than once; only the first call configures logging.
+
+    Args:
+        level: Minimum level recorded by the root logger
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers: list[logging.Handler] = []
+
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(formatter)
+    handlers.append(console_handler)
+
+    for logger_name, filename in AGENT_LOG_FILES.items():
+        file_handler = RotatingFileHandler(
+            filename, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, delay=True
+        )
+        file_handler.setFormatter(formatter)
+        file_handler.addFilter(logging.Filter(logger_name))
+        handlers.append(file_handler)
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(QueueHandler(log_queue))
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the background logging thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
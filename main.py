@@ -1,6 +1,11 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from configurations.logging_config import setup_logging, stop_logging
+
+# Configure logging before the agents are imported by the routes below
+setup_logging()
+
 from routes.health_check_routes import health_check_router
 from routes.medical_emergency_routes import medical_emergency_router
 from routes.electricity_emergency_routes import electricity_emergency_router
@@ -12,6 +17,8 @@ from routes.notification_routes import notification_router
 from routes.followup_routes import followup_router
 from models.database_models import Base
 from configurations.postgres_db import engine
+from configurations.config import config
+from agents._retriever_cache import preload_vector_stores
 import logging
 import os
 
@@ -41,7 +48,7 @@ if not os.getenv("VERCEL"):
 
 @app.on_event("startup")
 async def startup_event():
-    """Create database tables on startup"""
+    """Create database tables and optionally preload retrievers on startup"""
     try:
         # Create all tables
         Base.metadata.create_all(bind=engine)
@@ -50,10 +57,20 @@ async def startup_event():
         logger.error(f"Failed to create database tables: {e}")
         raise
 
+    if config.PRELOAD_RETRIEVERS:
+        # Index the knowledge bases now, concurrently, instead of on each agent's first query
+        await preload_vector_stores([
+            config.SOURCE_FILENAME_ELECTRICITY,
+            config.SOURCE_FILENAME_FIRE,
+            config.SOURCE_FILENAME_MEDICAL,
+            config.SOURCE_FILENAME_POLICE,
+        ])
+
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown"""
     logger.info("Application shutting down")
+    stop_logging()
 
 app.include_router(health_check_router)
 app.include_router(medical_emergency_router)
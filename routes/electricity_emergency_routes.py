@@ -1,12 +1,13 @@
 from fastapi import BackgroundTasks, APIRouter, UploadFile, File, Form
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from datetime import datetime, timezone
 import tempfile
 import os
 import asyncio
+import json
 from models.chat_model import ChatRequest, VoiceChatRequest, DeleteChatRequest
 from configurations.db import chat_collection, checkpoint_writes_collection, checkpoints_collection, deleted_chat_collection
-from utils.electricity_emergency_utils import respond, save_history
+from utils.electricity_emergency_utils import respond, respond_stream, save_history
 from utils.voice_utils import speech_to_text, text_to_speech
 
 electricity_emergency_router = APIRouter()
@@ -75,6 +76,35 @@ async def electricity_emergency_chat_endpoint(
         print("Error while working on electricity emergency chat request: ",str(e))
         return JSONResponse(status_code=500, content={"error": "We are facing an error. Please try again later."})
 
+@electricity_emergency_router.post("/api/electricity-emergency/chat/stream")
+async def electricity_emergency_chat_stream_endpoint(
+    user_id: str = Form(...),
+    message: str = Form(""),
+):
+    """
+    Stream the electricity agent's reply as server-sent events.
+
+    Each event carries a JSON object with a ``token`` field; the final event is
+    ``{"done": true}`` (or ``{"error": ...}`` if generation failed).
+    """
+    if not message:
+        return JSONResponse(status_code=400, content={"error": "No message provided"})
+
+    async def event_stream():
+        tokens = []
+        try:
+            async for token in respond_stream(user_id, message):
+                tokens.append(token)
+                yield f"data: {json.dumps({'token': token})}\n\n"
+            yield f"data: {json.dumps({'done': True})}\n\n"
+        except Exception as e:
+            print("Error while working on electricity emergency chat stream request: ",str(e))
+            yield f"data: {json.dumps({'error': 'We are facing an error. Please try again later.'})}\n\n"
+            return
+        await asyncio.to_thread(save_history, user_id, message, "".join(tokens).strip())
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
 @electricity_emergency_router.get("/api/electricity-emergency/chatHistory/{user_id}")
 async def get_electricity_emergency_chat_history(user_id: str):
     try:
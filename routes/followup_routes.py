@@ -1,7 +1,7 @@
 from fastapi import APIRouter, HTTPException, BackgroundTasks
 from pydantic import BaseModel
 from typing import Optional
-from agents.followup_agent import followup_graph
+from agents.followup_agent import followup_graph, memory
 from utils.database_utils import get_emergency_report_by_id
 import logging
 
@@ -71,18 +71,12 @@ async def chat_with_followup_agent(request: FollowupChatRequest, background_task
         # Create the conversation state
         config = {"configurable": {"thread_id": thread_id}}
         
-        # Get the current state
-        current_state = followup_graph.get_state(config)
-        
-        # Add the new message
-        messages = current_state.values.get("messages", [])
-        messages.append(HumanMessage(content=context_message))
-        
-        # Update the state
-        followup_graph.update_state(config, {"messages": messages})
-        
-        # Invoke the agent
-        result = followup_graph.invoke(None, config)
+        # Invoke the agent; the checkpointer appends the new message to the thread's history
+        try:
+            result = await followup_graph.ainvoke({"messages": [HumanMessage(content=context_message)]}, config)
+        finally:
+            # Persist this turn's checkpoints in a single round trip
+            await memory.aflush()
         
         # Get the last AI message
         last_message = result["messages"][-1]
@@ -188,7 +182,7 @@ async def get_conversation_history(thread_id: str):
     """
     try:
         config = {"configurable": {"thread_id": thread_id}}
-        state = followup_graph.get_state(config)
+        state = await followup_graph.aget_state(config)
         
         messages = state.values.get("messages", [])
         
@@ -226,7 +220,8 @@ async def clear_conversation_history(thread_id: str):
         config = {"configurable": {"thread_id": thread_id}}
         
         # Clear the conversation by updating with empty messages
-        followup_graph.update_state(config, {"messages": []})
+        await followup_graph.aupdate_state(config, {"messages": []})
+        await memory.aflush()
         
         return {
             "success": True,
@@ -0,0 +1,65 @@
+"""
+Streaming endpoint tests for the electricity agent.
+
+These run against the MongoDB given by ``MONGODB_URI`` (the graph checkpoints
+there) and are skipped when it is not reachable. The greeting path makes no
+OpenAI call.
+"""
+
+import json
+import os
+import uuid
+import pytest
+from pymongo import MongoClient
+
+
+def mongodb_available() -> bool:
+    """Return whether the configured MongoDB answers a ping."""
+    uri = os.getenv("MONGODB_URI")
+    if not uri:
+        return False
+    try:
+        MongoClient(uri, serverSelectionTimeoutMS=2000).admin.command("ping")
+        return True
+    except Exception:
+        return False
+
+
+pytestmark = pytest.mark.skipif(not mongodb_available(), reason="MongoDB is not reachable")
+
+
+def read_events(body: str) -> list[dict]:
+    """Parse the JSON payloads of a server-sent event stream."""
+    return [json.loads(event[len("data: "):]) for event in body.split("\n\n") if event.startswith("data: ")]
+
+
+@pytest.fixture
+def client():
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from routes.electricity_emergency_routes import electricity_emergency_router
+
+    app = FastAPI()
+    app.include_router(electricity_emergency_router)
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("message, language", [("hello", "en"), ("hola", "es")])
+def test_stream_sends_greeting_reply(client, message, language):
+    from agents.electricity_emergency_agent import GREETING_REPLIES, memory
+    from configurations.db import chat_collection
+
+    user_id = f"test_{uuid.uuid4().hex}"
+    try:
+        response = client.post("/api/electricity-emergency/chat/stream", data={"user_id": user_id, "message": message})
+
+        assert response.status_code == 200
+        events = read_events(response.text)
+        assert events[-1] == {"done": True}
+        assert "".join(event["token"] for event in events[:-1]) == GREETING_REPLIES[language]
+
+        record = chat_collection.find_one({"user_id": f"electricity_emergency_{user_id}"})
+        assert record["history"][-1]["content"] == GREETING_REPLIES[language]
+    finally:
+        chat_collection.delete_one({"user_id": f"electricity_emergency_{user_id}"})
+        memory.delete_thread(f"electricity_emergency_{user_id}")
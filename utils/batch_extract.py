@@ -0,0 +1,243 @@
+"""
+Offline case extraction through the OpenAI Batch API.
+
+Reprocessing stored conversations (analytics, backfills) does not need an
+answer within seconds, so instead of one structured-output call per
+conversation the requests are written to a JSONL file and submitted as a
+single batch: half the price of synchronous calls and outside the per-minute
+rate limits. Results are parsed back into the case schemas and saved like
+cases submitted from a live conversation.
+
+Usage:
+    python -m utils.batch_extract fire
+"""
+
+import argparse
+import io
+import json
+import logging
+import time
+from typing import Callable, NamedTuple, Optional
+from openai import OpenAI
+from openai.types import Batch
+from pydantic import BaseModel
+from dotenv import load_dotenv
+from configurations.db import chat_collection
+from agents.schemas.agent_schemas import (
+    ElectricityEmergencySchema,
+    FireEmergencySchema,
+    MedicalEmergencySchema,
+    PoliceEmergencySchema,
+)
+from agents.prompts.extraction import (
+    ELECTRICITY_EXTRACTION_INSTRUCTIONS,
+    FIRE_EXTRACTION_INSTRUCTIONS,
+    MEDICAL_EXTRACTION_INSTRUCTIONS,
+    POLICE_EXTRACTION_INSTRUCTIONS,
+)
+from utils.database_utils import (
+    save_electricity_emergency,
+    save_fire_emergency,
+    save_medical_emergency,
+    save_police_emergency,
+)
+
+logger = logging.getLogger(__name__)
+
+# Load environment variables
+load_dotenv()
+
+BATCH_MODEL = "gpt-4o-mini"
+BATCH_ENDPOINT = "/v1/chat/completions"
+BATCH_COMPLETION_WINDOW = "24h"
+BATCH_POLL_INTERVAL = 60
+_FINAL_BATCH_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+class CaseKind(NamedTuple):
+    """Schema, extraction instructions and save function of one case type."""
+
+    schema: type[BaseModel]
+    instructions: str
+    save: Callable[[str, BaseModel], str]
+
+
+CASE_KINDS = {
+    "electricity": CaseKind(ElectricityEmergencySchema, ELECTRICITY_EXTRACTION_INSTRUCTIONS, save_electricity_emergency),
+    "fire": CaseKind(FireEmergencySchema, FIRE_EXTRACTION_INSTRUCTIONS, save_fire_emergency),
+    "medical": CaseKind(MedicalEmergencySchema, MEDICAL_EXTRACTION_INSTRUCTIONS, save_medical_emergency),
+    "police": CaseKind(PoliceEmergencySchema, POLICE_EXTRACTION_INSTRUCTIONS, save_police_emergency),
+}
+
+
+def load_conversations(case_kind: str, user_ids: Optional[list[str]] = None) -> dict[str, list[dict]]:
+    """
+    Load stored chat histories of one case type.
+
+    Args:
+        case_kind: Key of ``CASE_KINDS``
+        user_ids: Users to load; all users with a history when omitted
+
+    Returns:
+        dict[str, list[dict]]: Chat history (``role``/``content`` entries) per user ID
+    """
+    prefix = f"{case_kind}_emergency_"
+    if user_ids is None:
+        query = {"user_id": {"$regex": f"^{prefix}"}}
+    else:
+        query = {"user_id": {"$in": [f"{prefix}{user_id}" for user_id in user_ids]}}
+
+    conversations = {}
+    for record in chat_collection.find(query, {"user_id": 1, "history": 1}):
+        if record.get("history"):
+            conversations[record["user_id"][len(prefix):]] = record["history"]
+    return conversations
+
+
+def build_batch_requests(conversations: dict[str, list[dict]], case_kind: str) -> list[dict]:
+    """
+    Build one structured-output chat completion request per conversation.
+
+    Args:
+        conversations: Chat history per user ID, as returned by ``load_conversations``
+        case_kind: Key of ``CASE_KINDS``
+
+    Returns:
+        list[dict]: Batch request lines, with the user ID as ``custom_id``
+    """
+    kind = CASE_KINDS[case_kind]
+    response_format = {
+        "type": "json_schema",
+        "json_schema": {"name": kind.schema.__name__, "schema": kind.schema.model_json_schema()},
+    }
+
+    requests = []
+    for user_id, history in conversations.items():
+        messages = [{"role": "system", "content": kind.instructions}]
+        messages.extend(
+            {"role": "user" if entry["role"] == "user" else "assistant", "content": entry["content"]}
+            for entry in history
+            if entry.get("content")
+        )
+        requests.append({
+            "custom_id": user_id,
+            "method": "POST",
+            "url": BATCH_ENDPOINT,
+            "body": {"model": BATCH_MODEL, "messages": messages, "response_format": response_format},
+        })
+    return requests
+
+
+def submit_batch(requests: list[dict], client: Optional[OpenAI] = None) -> Batch:
+    """
+    Upload batch requests as a JSONL file and start the batch.
+
+    Args:
+        requests: Request lines from ``build_batch_requests``
+        client: OpenAI client; a default client is created when omitted
+
+    Returns:
+        Batch: The created batch
+    """
+    client = client or OpenAI()
+    try:
+        payload = "\n".join(json.dumps(request) for request in requests).encode("utf-8")
+        batch_file = client.files.create(file=("batch_extract.jsonl", io.BytesIO(payload)), purpose="batch")
+        batch = client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=BATCH_COMPLETION_WINDOW,
+        )
+        logger.info(f"Submitted extraction batch {batch.id} with {len(requests)} requests")
+        return batch
+    except Exception as e:
+        logger.error(f"Error submitting extraction batch: {e}")
+        raise
+
+
+def wait_for_batch(batch_id: str, poll_interval: float = BATCH_POLL_INTERVAL, client: Optional[OpenAI] = None) -> Batch:
+    """
+    Poll a batch until it reaches a final status.
+
+    Args:
+        batch_id: ID of the batch
+        poll_interval: Seconds between status checks
+        client: OpenAI client; a default client is created when omitted
+
+    Returns:
+        Batch: The batch in its final status
+    """
+    client = client or OpenAI()
+    while True:
+        batch = client.batches.retrieve(batch_id)
+        if batch.status in _FINAL_BATCH_STATUSES:
+            return batch
+        time.sleep(poll_interval)
+
+
+def save_batch_results(batch: Batch, case_kind: str, client: Optional[OpenAI] = None) -> dict[str, str]:
+    """
+    Parse a finished batch's output and save every extracted case.
+
+    Requests that failed or returned invalid output are logged and skipped.
+
+    Args:
+        batch: Batch in ``completed`` status
+        case_kind: Key of ``CASE_KINDS`` the batch was built for
+        client: OpenAI client; a default client is created when omitted
+
+    Returns:
+        dict[str, str]: Saved case ID per user ID
+    """
+    if batch.status != "completed" or not batch.output_file_id:
+        raise ValueError(f"Batch {batch.id} has no results (status: {batch.status})")
+
+    client = client or OpenAI()
+    kind = CASE_KINDS[case_kind]
+    case_ids = {}
+    for line in client.files.content(batch.output_file_id).text.splitlines():
+        if not line.strip():
+            continue
+        result = json.loads(line)
+        user_id = result["custom_id"]
+        try:
+            if result.get("error"):
+                raise ValueError(result["error"])
+            content = result["response"]["body"]["choices"][0]["message"]["content"]
+            case_ids[user_id] = kind.save(user_id, kind.schema.model_validate_json(content))
+        except Exception as e:
+            logger.error(f"Error saving batch extraction for {user_id}: {e}")
+    return case_ids
+
+
+def reprocess_conversations(case_kind: str, user_ids: Optional[list[str]] = None, poll_interval: float = BATCH_POLL_INTERVAL) -> dict[str, str]:
+    """
+    Extract and save cases from stored conversations in one batch.
+
+    Args:
+        case_kind: Key of ``CASE_KINDS``
+        user_ids: Users to reprocess; all users with a history when omitted
+        poll_interval: Seconds between batch status checks
+
+    Returns:
+        dict[str, str]: Saved case ID per user ID
+    """
+    conversations = load_conversations(case_kind, user_ids)
+    if not conversations:
+        return {}
+    client = OpenAI()
+    batch = submit_batch(build_batch_requests(conversations, case_kind), client)
+    batch = wait_for_batch(batch.id, poll_interval, client)
+    return save_batch_results(batch, case_kind, client)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-extract emergency cases from stored conversations via the Batch API")
+    parser.add_argument("case_kind", choices=sorted(CASE_KINDS))
+    parser.add_argument("--user-id", action="append", dest="user_ids", help="Only reprocess this user (repeatable)")
+    parser.add_argument("--poll-interval", type=float, default=BATCH_POLL_INTERVAL)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    saved = reprocess_conversations(args.case_kind, args.user_ids, args.poll_interval)
+    print(f"Saved {len(saved)} {args.case_kind} cases")
@@ -0,0 +1,66 @@
+"""
+Ahead-of-time build of the knowledge-base vector indexes.
+
+The agents load their FAISS index, chunks and chunk vectors from
+``config.CACHE_DIR`` when the source file is unchanged, and only split and
+embed on a cache miss. Running this once at build time (e.g. while building
+the container image) fills that cache, so a fresh process starts by reading
+the index from disk instead of embedding every chunk.
+
+Usage:
+    python -m utils.build_kb_index                      # every agent's source
+    python -m utils.build_kb_index police_data.txt      # selected files in data/
+"""
+
+import argparse
+import logging
+import os
+import time
+from dotenv import load_dotenv
+from configurations.config import config
+from agents._retriever_cache import get_vector_store
+
+logger = logging.getLogger(__name__)
+
+# Load environment variables
+load_dotenv()
+
+# Knowledge-base files the emergency agents retrieve from
+SOURCE_FILENAMES = (
+    config.SOURCE_FILENAME_ELECTRICITY,
+    config.SOURCE_FILENAME_FIRE,
+    config.SOURCE_FILENAME_MEDICAL,
+    config.SOURCE_FILENAME_POLICE,
+)
+
+
+def build_indexes(source_filenames: tuple[str, ...] = SOURCE_FILENAMES) -> dict[str, float]:
+    """
+    Build and persist the vector index of each source file.
+
+    Args:
+        source_filenames: Names of files inside ``data/``
+
+    Returns:
+        dict[str, float]: Seconds spent building each source's index
+    """
+    timings: dict[str, float] = {}
+    for name in source_filenames:
+        if not os.path.exists(f"data/{name}"):
+            logger.error(f"Skipping missing knowledge-base file: data/{name}")
+            continue
+        started = time.perf_counter()
+        get_vector_store(name)
+        timings[name] = time.perf_counter() - started
+        logger.info(f"Built vector index for {name} in {timings[name]:.1f}s")
+    return timings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the knowledge-base vector indexes into the cache directory")
+    parser.add_argument("source_filenames", nargs="*", default=list(SOURCE_FILENAMES), help="Files inside data/ (default: every agent's source)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    built = build_indexes(tuple(args.source_filenames))
+    print(f"Built {len(built)} vector indexes in {config.CACHE_DIR}")
@@ -1,7 +1,10 @@
+import logging
 from configurations.db import chat_collection
 from datetime import datetime, timezone
 from langchain.schema import AIMessage
 
+logger = logging.getLogger(__name__)
+
 
 def load_history(user_id: str):
     """Load user history from MongoDB."""
@@ -28,32 +31,27 @@ def save_history(user_id: str, user_message: str, bot_messages: str):
 
 async def respond(user_id: str, user_message: str):
     try:
-        print(f"Fire emergency respond called - user_id: {user_id}, message: {user_message}")
-        
         # Import the fire emergency graph
-        from agents.fire_emergency_agent import fire_emergency_graph
+        from agents.fire_emergency_agent import fire_emergency_graph, memory
         
         config = {"configurable": {"thread_id": f"fire_emergency_{user_id}"}}
         combined_response = ""
         
-        print(f"Starting fire emergency graph stream for user: {user_id}")
-        for step in fire_emergency_graph.stream(
-            {"messages": [{"role": "user", "content": user_message}]},
-            stream_mode="values",
-            config=config,
-            ):
-            print(f"Fire emergency step: {step}")
-    
-            if "messages" in step and step["messages"]:
-                last_message = step["messages"][-1]
-                if isinstance(last_message, AIMessage) and hasattr(last_message, "content"):
-                    combined_response += last_message.content + "\n"
+        try:
+            async for step in fire_emergency_graph.astream(
+                {"messages": [{"role": "user", "content": user_message}]},
+                stream_mode="values",
+                config=config,
+                ):
+                if "messages" in step and step["messages"]:
+                    last_message = step["messages"][-1]
+                    if isinstance(last_message, AIMessage) and hasattr(last_message, "content"):
+                        combined_response += last_message.content + "\n"
+        finally:
+            # Persist this turn's checkpoints in a single round trip, even if the run failed
+            await memory.aflush()
         
-        result = combined_response.strip()
-        print(f"Fire emergency response result: {result}")
-        return result
+        return combined_response.strip()
     except Exception as e:
-        print(f"Error in fire emergency respond: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.error(f"Error in fire emergency respond: {e}")
         raise Exception(f"Error generating fire emergency response: {e}")
\ No newline at end of file
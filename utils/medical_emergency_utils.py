@@ -1,7 +1,7 @@
 from configurations.db import chat_collection
 from datetime import datetime, timezone
 from langchain.schema import AIMessage
-from agents.medical_emergency_agent import medical_emergency_graph
+from agents.medical_emergency_agent import medical_emergency_graph, memory
 
 
 def load_history(user_id: str):
@@ -31,7 +31,7 @@ async def respond(user_id: str, user_message: str):
     try:
         config = {"configurable": {"thread_id": f"medical_emergency_{user_id}"}}
         combined_response = ""
-        for step in medical_emergency_graph.stream(
+        async for step in medical_emergency_graph.astream(
             {"messages": [{"role": "user", "content": user_message}]},
             stream_mode="values",
             config=config,
@@ -44,3 +44,32 @@ async def respond(user_id: str, user_message: str):
         return combined_response.strip()
     except Exception as e:
         raise Exception(f"Error generating medical emergency response: {e}")
+    finally:
+        # Persist this turn's checkpoints in a single round trip
+        await memory.aflush()
+
+
+async def respond_stream(user_id: str, user_message: str):
+    """Yield the medical agent's reply text as it is generated."""
+    try:
+        config = {"configurable": {"thread_id": f"medical_emergency_{user_id}"}}
+        last_message_id = None
+        async for chunk, metadata in medical_emergency_graph.astream(
+            {"messages": [{"role": "user", "content": user_message}]},
+            stream_mode="messages",
+            config=config,
+            ):
+
+            # Model replies arrive as AIMessageChunk tokens; replies generate builds itself
+            # (e.g. a canned greeting) arrive once as a complete AIMessage
+            if metadata.get("langgraph_node") != "generate" or not isinstance(chunk, AIMessage) or not chunk.content:
+                continue
+            # Separate replies from successive generate steps like respond() does
+            if last_message_id is not None and chunk.id != last_message_id:
+                yield "\n"
+            last_message_id = chunk.id
+            yield chunk.content
+    except Exception as e:
+        raise Exception(f"Error streaming medical emergency response: {e}")
+    finally:
+        await memory.aflush()
@@ -3,7 +3,7 @@ Utility functions for formatting conversation messages from agent states.
 """
 
 from typing import List, Dict, Any
-from langchain_core.messages import HumanMessage, AIMessage
+from langchain_core.messages import HumanMessage, AIMessage, BaseMessage
 
 
 def format_conversation_messages(state: Dict[str, Any]) -> str:
@@ -30,6 +30,28 @@ def format_conversation_messages(state: Dict[str, Any]) -> str:
     return "\n\n".join(formatted_messages)
 
 
+def conversation_messages(state: Dict[str, Any]) -> List[BaseMessage]:
+    """
+    Extract the human and AI turns from agent state as chat messages.
+
+    Tool calls and tool results are dropped so the list can be sent to a model
+    on its own (an AI tool call without its tool result is rejected).
+
+    Args:
+        state: Agent state containing messages list
+
+    Returns:
+        List[BaseMessage]: Human messages and AI messages with text content
+    """
+    turns: List[BaseMessage] = []
+    for message in state.get("messages", []):
+        if isinstance(message, HumanMessage):
+            turns.append(message)
+        elif isinstance(message, AIMessage) and message.content and message.content.strip():
+            turns.append(AIMessage(content=message.content))
+    return turns
+
+
 def extract_conversation_summary(state: Dict[str, Any]) -> str:
     """
     Extract a concise summary of the conversation for case submission.
@@ -1,7 +1,7 @@
 from configurations.db import chat_collection
 from datetime import datetime, timezone
 from langchain.schema import AIMessage
-from agents.police_emergency_agent import police_emergency_graph
+from agents.police_emergency_agent import police_emergency_graph, memory
 
 
 def load_history(user_id: str):
@@ -31,7 +31,7 @@ async def respond(user_id: str, user_message: str):
     try:
         config = {"configurable": {"thread_id": f"police_emergency_{user_id}"}}
         combined_response = ""
-        for step in police_emergency_graph.stream(
+        async for step in police_emergency_graph.astream(
             {"messages": [{"role": "user", "content": user_message}]},
             stream_mode="values",
             config=config,
@@ -44,3 +44,6 @@ async def respond(user_id: str, user_message: str):
         return combined_response.strip()
     except Exception as e:
         raise Exception(f"Error generating police emergency response: {e}")
+    finally:
+        # Persist this turn's checkpoints in a single round trip
+        await memory.aflush()